@@ -2,23 +2,25 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import json
+import plotly.io as pio
 from pathlib import Path
 import sys
 
+try:
+    import orjson  # noqa: F401
+    # orjson serializes numpy-backed traces natively, avoiding per-float boxing
+    pio.json.config.default_engine = 'orjson'
+except ImportError:  # Keep Plotly's default JSON engine when orjson is unavailable
+    pass
+
 # Add src to path
 src_path = Path(__file__).parent / "src"
 sys.path.append(str(src_path))
 
-from src.config import Config
+from src.config import get_config
 from src.data_loader import DataLoader
-from src.document_processor import DocumentProcessor
-from src.pattern_analyzer import PatternAnalyzer
-from src.similarity_search import SimilaritySearchEngine
-from src.tip_generator import TipGenerator
 
 # Page configuration
 st.set_page_config(
@@ -37,12 +39,6 @@ st.markdown("""
         text-align: center;
         margin-bottom: 2rem;
     }
-    .metric-card {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #1f77b4;
-    }
     .tip-card {
         background-color: #f9f9f9;
         padding: 1rem;
@@ -62,32 +58,78 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_data_loader():
+    """Create the data loader once per Streamlit process."""
+    return DataLoader(get_config())
+
 @st.cache_data
 def load_data():
     """Load and cache all data."""
     try:
-        config = Config()
-        data_loader = DataLoader(config)
+        config = get_config()
+        data_loader = get_data_loader()
         
         # Load CSV data
         transactions_df, users_df, tax_filings_df = data_loader.load_csv_data()
         
+        # Derive the month once so pages don't re-parse dates on every render
+        transactions_df['month'] = transactions_df['transaction_date'].dt.month.astype('int8')
+        
+        # Low-cardinality string columns as categoricals for cheaper groupbys
+        for column in ['user_id', 'category', 'vendor']:
+            transactions_df[column] = transactions_df[column].astype('category')
+        users_df['occupation_category'] = users_df['occupation_category'].astype('category')
+        
+        # Arrow-backed strings so free-text search runs in pyarrow compute kernels
+        transactions_df['description'] = transactions_df['description'].astype('string[pyarrow]')
+        
+        # Aggregates shown on the overview page
+        aggregates = {
+            'category_spending': transactions_df.groupby('category', observed=True)['amount'].sum().sort_values(ascending=True),
+            'monthly_spending': transactions_df.groupby('month')['amount'].sum(),
+            'occupation_counts': users_df['occupation_category'].value_counts()
+        }
+        
+        # Per-category amounts sorted once, so similar-amount lookups are binary searches
+        amount_index = {
+            category: group['amount'].sort_values()
+            for category, group in transactions_df.groupby('category', observed=True)
+        }
+        
+        # Row positions per user, so the user page slices instead of scanning every transaction
+        user_rows = transactions_df.groupby('user_id', observed=True).indices
+        
         # Load processed results if available
-        results_dir = Path("results")
+        results_dir = config.results_dir
         processed_data = {}
         
         if results_dir.exists():
             for file_name in ["patterns.json", "all_tips.json", "receipt_data.json", "payslip_data.json"]:
-                file_path = results_dir / file_name
-                if file_path.exists():
-                    with open(file_path, 'r') as f:
-                        processed_data[file_name.replace('.json', '')] = json.load(f)
+                if (results_dir / file_name).exists():
+                    processed_data[file_name.replace('.json', '')] = data_loader.load_processed_data(file_name)
+        
+        # Per-user tip summaries, so the tips page only does dict lookups
+        tips_summary = summarize_tips(processed_data.get('all_tips', {}))
+        
+        # Document amounts as numeric frames for vectorized summaries
+        documents = {
+            'receipts': pd.DataFrame(processed_data.get('receipt_data', []), columns=['total_amount']),
+            'payslips': pd.DataFrame(processed_data.get('payslip_data', []), columns=['gross_pay'])
+        }
+        documents['receipts']['total_amount'] = pd.to_numeric(documents['receipts']['total_amount'], errors='coerce')
+        documents['payslips']['gross_pay'] = pd.to_numeric(documents['payslips']['gross_pay'], errors='coerce')
         
         return {
             'transactions': transactions_df,
             'users': users_df,
             'tax_filings': tax_filings_df,
-            'processed': processed_data
+            'processed': processed_data,
+            'agg': aggregates,
+            'amount_index': amount_index,
+            'user_rows': user_rows,
+            'tips_summary': tips_summary,
+            'documents': documents
         }
     except Exception as e:
         st.error(f"Error loading data: {e}")
@@ -135,67 +177,68 @@ def show_overview(data):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.metric("Total Users", len(users_df))
-        st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.metric("Total Transactions", len(transactions_df))
-        st.markdown('</div>', unsafe_allow_html=True)
     
     with col3:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         total_amount = transactions_df['amount'].sum()
         st.metric("Total Amount", f"€{total_amount:,.2f}")
-        st.markdown('</div>', unsafe_allow_html=True)
     
     with col4:
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         avg_deduction = tax_filings_df['total_deductions'].mean()
         st.metric("Avg Deductions", f"€{avg_deduction:,.2f}")
-        st.markdown('</div>', unsafe_allow_html=True)
     
     # Data overview charts
+    category_fig, occupation_fig, monthly_fig = build_overview_figures(
+        data['agg']['category_spending'],
+        data['agg']['occupation_counts'],
+        data['agg']['monthly_spending']
+    )
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Spending by Category")
-        category_spending = transactions_df.groupby('category')['amount'].sum().sort_values(ascending=True)
-        fig = px.bar(
-            x=category_spending.values,
-            y=category_spending.index,
-            orientation='h',
-            title="Total Spending by Category"
-        )
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(category_fig, use_container_width=True)
     
     with col2:
         st.subheader("User Demographics")
-        occupation_counts = users_df['occupation_category'].value_counts()
-        fig = px.pie(
-            values=occupation_counts.values,
-            names=occupation_counts.index,
-            title="Users by Occupation"
-        )
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(occupation_fig, use_container_width=True)
     
     # Monthly spending trends
     st.subheader("Monthly Spending Trends")
-    transactions_df['month'] = pd.to_datetime(transactions_df['transaction_date']).dt.month
-    monthly_spending = transactions_df.groupby('month')['amount'].sum()
+    st.plotly_chart(monthly_fig, use_container_width=True)
+
+@st.cache_data
+def build_overview_figures(category_spending, occupation_counts, monthly_spending):
+    """Build the overview charts once per distinct set of aggregates."""
+    category_fig = px.bar(
+        x=category_spending.values,
+        y=category_spending.index,
+        orientation='h',
+        title="Total Spending by Category"
+    )
+    category_fig.update_layout(height=400)
+    
+    occupation_fig = px.pie(
+        values=occupation_counts.values,
+        names=occupation_counts.index,
+        title="Users by Occupation"
+    )
+    occupation_fig.update_layout(height=400)
     
-    fig = px.line(
+    monthly_fig = px.line(
         x=monthly_spending.index,
         y=monthly_spending.values,
         title="Monthly Spending Pattern",
         markers=True
     )
-    fig.update_xaxes(title="Month")
-    fig.update_yaxes(title="Amount (€)")
-    st.plotly_chart(fig, use_container_width=True)
+    monthly_fig.update_xaxes(title="Month")
+    monthly_fig.update_yaxes(title="Amount (€)")
+    
+    return category_fig, occupation_fig, monthly_fig
 
 def show_user_analysis(data):
     """Show detailed user analysis."""
@@ -210,7 +253,7 @@ def show_user_analysis(data):
     
     if selected_user:
         user_info = users_df[users_df['user_id'] == selected_user].iloc[0]
-        user_transactions = transactions_df[transactions_df['user_id'] == selected_user]
+        user_transactions = transactions_df.iloc[data['user_rows'].get(selected_user, [])]
         user_tax_data = tax_filings_df[tax_filings_df['user_id'] == selected_user]
         
         # User profile
@@ -234,7 +277,7 @@ def show_user_analysis(data):
             
             with col1:
                 # Category breakdown
-                category_spending = user_transactions.groupby('category')['amount'].sum()
+                category_spending = user_transactions.groupby('category', observed=True)['amount'].sum()
                 fig = px.pie(
                     values=category_spending.values,
                     names=category_spending.index,
@@ -244,7 +287,6 @@ def show_user_analysis(data):
             
             with col2:
                 # Monthly spending
-                user_transactions['month'] = pd.to_datetime(user_transactions['transaction_date']).dt.month
                 monthly = user_transactions.groupby('month')['amount'].sum()
                 fig = px.bar(
                     x=monthly.index,
@@ -258,7 +300,7 @@ def show_user_analysis(data):
             # Transaction details
             st.subheader("Recent Transactions")
             st.dataframe(
-                user_transactions.sort_values('transaction_date', ascending=False).head(10),
+                user_transactions.nlargest(10, 'transaction_date'),
                 use_container_width=True
             )
         
@@ -348,16 +390,15 @@ def show_pattern_discovery(data):
         
         if 'monthly_category_spending' in seasonal_patterns:
             monthly_data = seasonal_patterns['monthly_category_spending']
-            monthly_df = pd.DataFrame(monthly_data)
             
-            if not monthly_df.empty:
+            if monthly_data:
                 # Pivot for heatmap
-                pivot_data = monthly_df.pivot(index='category', columns='month', values='amount')
+                categories, months, matrix = pivot_records(monthly_data, 'category', 'month', 'amount')
                 
                 fig = px.imshow(
-                    pivot_data.values,
-                    x=pivot_data.columns,
-                    y=pivot_data.index,
+                    matrix,
+                    x=months,
+                    y=categories,
                     title="Spending Heatmap by Category and Month",
                     aspect="auto"
                 )
@@ -386,6 +427,15 @@ def show_pattern_discovery(data):
                 cluster_df = pd.DataFrame(cluster_data)
                 st.dataframe(cluster_df, use_container_width=True)
 
+def pivot_records(records, index, columns, values):
+    """Pivot a list of record dicts into (row labels, column labels, 2D array) without a DataFrame."""
+    row_labels, row_idx = np.unique([r[index] for r in records], return_inverse=True)
+    col_labels, col_idx = np.unique([r[columns] for r in records], return_inverse=True)
+    
+    matrix = np.full((len(row_labels), len(col_labels)), np.nan)
+    matrix[row_idx, col_idx] = [r[values] for r in records]
+    return row_labels.tolist(), col_labels.tolist(), matrix
+
 def show_document_processing(data):
     """Show document processing results."""
     st.header("📄 Document Processing")
@@ -401,7 +451,7 @@ def show_document_processing(data):
             st.success(f"Processed {len(receipt_data)} receipts")
             
             # Show receipt summary
-            total_amount = sum(r.get('total_amount', 0) for r in receipt_data if r.get('total_amount'))
+            total_amount = data['documents']['receipts']['total_amount'].sum()
             st.metric("Total Receipt Value", f"€{total_amount:.2f}")
             
             # Show receipt details
@@ -426,7 +476,7 @@ def show_document_processing(data):
             st.success(f"Processed {len(payslip_data)} payslips")
             
             # Show payslip summary
-            avg_gross = sum(p.get('gross_pay', 0) for p in payslip_data) / len(payslip_data) if payslip_data else 0
+            avg_gross = data['documents']['payslips']['gross_pay'].fillna(0).mean()
             st.metric("Average Gross Pay", f"€{avg_gross:.2f}")
             
             # Show payslip details
@@ -444,6 +494,23 @@ def show_document_processing(data):
         else:
             st.warning("No payslip data found. Run document processing first.")
 
+def summarize_tips(all_tips):
+    """Group each user's tips by priority and category and total their savings."""
+    summary = {}
+    for user_id, user_tips in all_tips.items():
+        by_priority = {}
+        by_category = {}
+        for tip in user_tips:
+            by_priority.setdefault(tip.get('priority'), []).append(tip)
+            by_category.setdefault(tip.get('category', 'Other'), []).append(tip)
+        
+        summary[user_id] = {
+            'total_savings': sum(tip.get('potential_savings', 0) for tip in user_tips),
+            'by_priority': by_priority,
+            'by_category': by_category
+        }
+    return summary
+
 def show_tax_tips(data):
     """Show personalized tax tips."""
     st.header("💡 Tax Optimization Tips")
@@ -456,10 +523,12 @@ def show_tax_tips(data):
         return
     
     # User selection
-    selected_user = st.selectbox("Select a user for tips", list(all_tips.keys()))
+    tips_summary = data['tips_summary']
+    selected_user = st.selectbox("Select a user for tips", tuple(tips_summary))
     
     if selected_user and selected_user in all_tips:
         user_tips = all_tips[selected_user]
+        user_summary = tips_summary[selected_user]
         
         if not user_tips:
             st.info("No tips available for this user.")
@@ -471,9 +540,9 @@ def show_tax_tips(data):
         # Summary metrics
         col1, col2, col3 = st.columns(3)
         
-        total_savings = sum(tip.get('potential_savings', 0) for tip in user_tips)
-        high_priority = len([tip for tip in user_tips if tip.get('priority') == 'HIGH'])
-        medium_priority = len([tip for tip in user_tips if tip.get('priority') == 'MEDIUM'])
+        total_savings = user_summary['total_savings']
+        high_priority = len(user_summary['by_priority'].get('HIGH', []))
+        medium_priority = len(user_summary['by_priority'].get('MEDIUM', []))
         
         with col1:
             st.metric("Total Potential Savings", f"€{total_savings:.2f}")
@@ -487,7 +556,7 @@ def show_tax_tips(data):
         priority_colors = {'HIGH': 'high-priority', 'MEDIUM': 'medium-priority', 'LOW': 'low-priority'}
         
         for priority in priority_order:
-            priority_tips = [tip for tip in user_tips if tip.get('priority') == priority]
+            priority_tips = user_summary['by_priority'].get(priority, [])
             
             if priority_tips:
                 st.subheader(f"{priority.title()} Priority Tips")
@@ -514,18 +583,21 @@ def show_tax_tips(data):
         # Tips by category
         st.subheader("Tips by Category")
         
-        tips_by_category = {}
-        for tip in user_tips:
-            category = tip.get('category', 'Other')
-            if category not in tips_by_category:
-                tips_by_category[category] = []
-            tips_by_category[category].append(tip)
+        tips_by_category = user_summary['by_category']
         
         for category, category_tips in tips_by_category.items():
             with st.expander(f"{category} ({len(category_tips)} tips)"):
                 for tip in category_tips:
                     st.write(f"**{tip.get('title')}** - €{tip.get('potential_savings', 0):.2f} potential savings")
 
+def contains_text(series, query):
+    """Case-insensitive literal substring match over a string or categorical column."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Match against the (few) categories, then map back via the codes
+        categories = series.cat.categories
+        return series.isin(categories[categories.str.contains(query, case=False, regex=False)])
+    return series.str.contains(query, case=False, regex=False, na=False)
+
 def show_similarity_search(data):
     """Show similarity search functionality."""
     st.header("🔗 Similarity Search")
@@ -557,13 +629,12 @@ def show_similarity_search(data):
                 st.write(f"- **Vendor:** {selected_transaction['vendor']}")
                 
                 # Find similar transactions (simple similarity based on category and amount)
-                similar_transactions = transactions_df[
-                    (transactions_df['category'] == selected_transaction['category']) &
-                    (transactions_df['amount'].between(
-                        selected_transaction['amount'] * 0.8,
-                        selected_transaction['amount'] * 1.2
-                    )) &
-                    (transactions_df['transaction_id'] != selected_transaction['transaction_id'])
+                category_amounts = data['amount_index'][selected_transaction['category']]
+                start = category_amounts.searchsorted(selected_transaction['amount'] * 0.8, side='left')
+                end = category_amounts.searchsorted(selected_transaction['amount'] * 1.2, side='right')
+                candidates = transactions_df.loc[category_amounts.index[start:end].sort_values()]
+                similar_transactions = candidates[
+                    candidates['transaction_id'] != selected_transaction['transaction_id']
                 ].head(10)
                 
                 if not similar_transactions.empty:
@@ -578,9 +649,9 @@ def show_similarity_search(data):
         if query:
             # Simple text search in descriptions
             matching_transactions = transactions_df[
-                transactions_df['description'].str.contains(query, case=False, na=False) |
-                transactions_df['category'].str.contains(query, case=False, na=False) |
-                transactions_df['vendor'].str.contains(query, case=False, na=False)
+                contains_text(transactions_df['description'], query) |
+                contains_text(transactions_df['category'], query) |
+                contains_text(transactions_df['vendor'], query)
             ].head(20)
             
             if not matching_transactions.empty:
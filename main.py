@@ -5,13 +5,18 @@ A comprehensive AI-powered solution for processing tax documents and generating
 
 import os
 import sys
-import json
 import pandas as pd
 from pathlib import Path
 
 def clean_data_for_json(obj):
     """Recursively clean data to ensure JSON serialization compatibility."""
-    if isinstance(obj, dict):
+    obj_type = type(obj)
+    # Fast paths for plain Python leaves, which make up most of the payload
+    if obj is None or obj_type is str or obj_type is int or obj_type is bool:
+        return obj
+    elif obj_type is float:
+        return None if obj != obj else obj  # NaN -> None
+    elif isinstance(obj, dict):
         # Convert tuple keys to strings
         cleaned = {}
         for key, value in obj.items():
@@ -21,9 +26,7 @@ def clean_data_for_json(obj):
                 key = str(key)
             cleaned[key] = clean_data_for_json(value)
         return cleaned
-    elif isinstance(obj, list):
-        return [clean_data_for_json(item) for item in obj]
-    elif isinstance(obj, tuple):
+    elif isinstance(obj, (list, tuple)):
         return [clean_data_for_json(item) for item in obj]
     elif pd.isna(obj):
         return None
@@ -42,7 +45,7 @@ from src.document_processor import DocumentProcessor
 from src.pattern_analyzer import PatternAnalyzer
 from src.similarity_search import SimilaritySearchEngine
 from src.tip_generator import TipGenerator
-from src.config import Config
+from src.config import get_config
 from src.data_loader import DataLoader
 
 def main():
@@ -50,7 +53,7 @@ def main():
     print("🚀 Starting Tax Document Processing System")
     
     # Initialize configuration
-    config = Config()
+    config = get_config()
     
     # Initialize components
     data_loader = DataLoader(config)
@@ -80,17 +83,13 @@ def main():
     
     # Generate tips for all users
     print("💡 Generating tax optimization tips...")
-    all_tips = {}
-    for user_id in users_df['user_id'].unique():
-        user_tips = tip_generator.generate_tips_for_user(
-            user_id, transactions_df, users_df, tax_filings_df, patterns
-        )
-        all_tips[user_id] = user_tips
+    all_tips = tip_generator.generate_tips_for_users(
+        users_df['user_id'].unique(), transactions_df, users_df, tax_filings_df, patterns
+    )
+    for user_id, user_tips in all_tips.items():
         print(f"Generated {len(user_tips)} tips for user {user_id}")
       # Save results
     print("💾 Saving results...")
-    results_dir = Path("results")
-    results_dir.mkdir(exist_ok=True)
     
     # Clean data for JSON serialization
     cleaned_receipt_data = clean_data_for_json(receipt_data)
@@ -98,18 +97,11 @@ def main():
     cleaned_patterns = clean_data_for_json(patterns)
     cleaned_tips = clean_data_for_json(all_tips)
     
-    # Save extracted document data
-    with open(results_dir / "receipt_data.json", "w") as f:
-        json.dump(cleaned_receipt_data, f, indent=2, default=str)
-    
-    with open(results_dir / "payslip_data.json", "w") as f:
-        json.dump(cleaned_payslip_data, f, indent=2, default=str)
-    
-    with open(results_dir / "patterns.json", "w") as f:
-        json.dump(cleaned_patterns, f, indent=2, default=str)
-    
-    with open(results_dir / "all_tips.json", "w") as f:
-        json.dump(cleaned_tips, f, indent=2, default=str)
+    # Save extracted document data (orjson-backed when available)
+    data_loader.save_processed_data(cleaned_receipt_data, "receipt_data.json")
+    data_loader.save_processed_data(cleaned_payslip_data, "payslip_data.json")
+    data_loader.save_processed_data(cleaned_patterns, "patterns.json")
+    data_loader.save_processed_data(cleaned_tips, "all_tips.json")
     
     print("✅ Processing complete! Check the results directory for outputs.")
     print("📊 To view visualizations, run the Pattern Recognition Analysis notebook.")
@@ -11,13 +11,27 @@ Version: 1.0.0
 __version__ = "1.0.0"
 __author__ = "Tax AI Engineering Team"
 
-# Import main components for easy access
-from .config import Config
-from .data_loader import DataLoader
-from .document_processor import DocumentProcessor
-from .pattern_analyzer import PatternAnalyzer
-from .similarity_search import SimilaritySearchEngine
-from .tip_generator import TipGenerator
+import importlib
+
+# Main components are imported lazily on first access so that importing a
+# lightweight module (e.g. src.config) doesn't pull in the Google Cloud,
+# FAISS and sentence-transformers stacks.
+_LAZY_IMPORTS = {
+    "Config": ".config",
+    "DataLoader": ".data_loader",
+    "DocumentProcessor": ".document_processor",
+    "PatternAnalyzer": ".pattern_analyzer",
+    "SimilaritySearchEngine": ".similarity_search",
+    "TipGenerator": ".tip_generator",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "Config",
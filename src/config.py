@@ -3,6 +3,7 @@
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from functools import lru_cache
 
 class Config:
     """Configuration class for the tax processing system."""
@@ -27,6 +28,18 @@ class Config:
         self.vertex_ai_location = os.getenv('VERTEX_AI_LOCATION', 'global')
         self.vertex_ai_model = os.getenv('VERTEX_AI_MODEL', 'gemini-2.0-flash-001')
         
+        # Maximum number of concurrent Document AI requests
+        self.ocr_concurrency = int(os.getenv('OCR_CONCURRENCY', '4'))
+        
+        # Worker processes for generating tips across many users
+        self.tip_workers = int(os.getenv('TIP_WORKERS', str(os.cpu_count() or 1)))
+        
+        # K-means restarts for user clustering; fewer restarts are faster but can change cluster assignments
+        self.kmeans_n_init = int(os.getenv('KMEANS_N_INIT', '10'))
+        
+        # Keep the full OCR transcript in document metadata (off by default to save memory)
+        self.include_full_text = os.getenv('INCLUDE_FULL_TEXT', 'false').lower() in ('1', 'true', 'yes')
+        
         # Data paths
         self.data_dir = Path('data')
         self.csv_dir = self.data_dir / 'csv'
@@ -37,9 +50,33 @@ class Config:
         self.results_dir = Path('results')
         self.results_dir.mkdir(exist_ok=True)
         
+        # Document AI responses cached by file content hash
+        self.ocr_cache_dir = self.results_dir / '.ocr_cache'
+        self.ocr_cache_dir.mkdir(exist_ok=True)
+        
+        # Reuse cached pattern analysis and tip results across runs (opt-in; stale entries are keyed out by code and config)
+        self.cache_results = os.getenv('CACHE_RESULTS', 'false').lower() in ('1', 'true', 'yes')
+        
+        # Pattern analysis results cached by input data, code and config hash (created only when caching is on)
+        self.patterns_cache_dir = self.results_dir / '.patterns_cache'
+        if self.cache_results:
+            self.patterns_cache_dir.mkdir(exist_ok=True)
+        
+        # Transaction embeddings cached by description hash
+        self.embedding_cache_dir = self.results_dir / '.embedding_cache'
+        self.embedding_cache_dir.mkdir(exist_ok=True)
+        
+        # Generated tips cached by input data, rules and code hash (created only when caching is on)
+        self.tips_cache_dir = self.results_dir / '.tips_cache'
+        if self.cache_results:
+            self.tips_cache_dir.mkdir(exist_ok=True)
+        
         # Model configuration
         self.embedding_model = 'sentence-transformers/all-MiniLM-L6-v2'
         
+        # Run the embedding model in half precision on CUDA (opt-in; vectors then differ slightly from float32 runs)
+        self.embedding_fp16 = os.getenv('EMBEDDING_FP16', 'false').lower() in ('1', 'true', 'yes')
+        
         # Validate required configurations
         self._validate_config()
     
@@ -67,3 +104,8 @@ class Config:
         for dir_path in [self.csv_dir, self.receipt_dir, self.payslip_dir]:
             if not dir_path.exists():
                 raise FileNotFoundError(f"Data directory not found: {dir_path}")
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Return the process-wide configuration, loading .env and validating it only once."""
+    return Config()
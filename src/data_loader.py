@@ -1,9 +1,17 @@
 """Data loading utilities for the tax processing system."""
 
+import os
 import pandas as pd
 from pathlib import Path
 from typing import Tuple
 import logging
+import json
+import mmap
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder when orjson is unavailable
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -22,16 +30,23 @@ class DataLoader:
             Tuple of (transactions_df, users_df, tax_filings_df)
         """
         try:
+            # The pyarrow engine parses multithreaded and converts ISO dates natively
             # Load transactions data
-            transactions_df = pd.read_csv(self.config.csv_dir / 'transactions.csv')
-            transactions_df['transaction_date'] = pd.to_datetime(transactions_df['transaction_date'])
+            transactions_df = pd.read_csv(
+                self.config.csv_dir / 'transactions.csv',
+                engine='pyarrow',
+                parse_dates=['transaction_date']
+            )
             
             # Load users data
-            users_df = pd.read_csv(self.config.csv_dir / 'users.csv')
+            users_df = pd.read_csv(self.config.csv_dir / 'users.csv', engine='pyarrow')
             
             # Load tax filings data
-            tax_filings_df = pd.read_csv(self.config.csv_dir / 'tax_filings.csv')
-            tax_filings_df['filing_date'] = pd.to_datetime(tax_filings_df['filing_date'])
+            tax_filings_df = pd.read_csv(
+                self.config.csv_dir / 'tax_filings.csv',
+                engine='pyarrow',
+                parse_dates=['filing_date']
+            )
             
             logger.info(f"Loaded {len(transactions_df)} transactions, {len(users_df)} users, {len(tax_filings_df)} tax filings")
             
@@ -53,53 +68,77 @@ class DataLoader:
         """
         if document_type == 'receipt':
             dir_path = self.config.receipt_dir
-            extensions = ['.png', '.jpg', '.jpeg']
+            extensions = {'.png', '.jpg', '.jpeg'}
         elif document_type == 'payslip':
             dir_path = self.config.payslip_dir
-            extensions = ['.pdf']
+            extensions = {'.pdf'}
         else:
             raise ValueError(f"Unknown document type: {document_type}")
         
-        files = []
-        for ext in extensions:
-            files.extend(list(dir_path.glob(f'*{ext}')))
+        # Single directory pass; DirEntry caches the file type from the listing
+        with os.scandir(dir_path) as entries:
+            files = [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+            ]
         
         return sorted(files)
     
-    def save_processed_data(self, data: dict, filename: str):
+    def save_processed_data(self, data, filename: str):
         """
-        Save processed data to JSON file.
+        Save processed data to a JSON or Parquet file.
+        
+        DataFrames saved under a ``.parquet`` filename are written as
+        zstd-compressed Parquet, which keeps their dtypes; everything
+        else is written as JSON.
         
         Args:
             data: Data to save
             filename: Output filename
         """
-        import json
-        
         output_path = self.config.results_dir / filename
-        with open(output_path, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        if output_path.suffix == '.parquet' and isinstance(data, pd.DataFrame):
+            data.to_parquet(output_path, engine='pyarrow', compression='zstd')
+        elif orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(
+                    data,
+                    default=str,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                ))
+        else:
+            with open(output_path, 'w') as f:
+                json.dump(data, f, indent=2, default=str)
         
         logger.info(f"Saved processed data to {output_path}")
     
-    def load_processed_data(self, filename: str) -> dict:
+    def load_processed_data(self, filename: str):
         """
-        Load processed data from JSON file.
+        Load processed data from a JSON or Parquet file.
         
         Args:
             filename: Input filename
             
         Returns:
-            Loaded data
+            Loaded data (a DataFrame for ``.parquet`` files)
         """
-        import json
-        
         input_path = self.config.results_dir / filename
         if not input_path.exists():
             return {}
         
-        with open(input_path, 'r') as f:
-            data = json.load(f)
+        if input_path.suffix == '.parquet':
+            data = pd.read_parquet(input_path, engine='pyarrow')
+            logger.info(f"Loaded processed data from {input_path}")
+            return data
+        
+        with open(input_path, 'rb') as f:
+            if orjson is not None and input_path.stat().st_size > 0:
+                # Parse straight from the memory-mapped file, avoiding a full bytes copy
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        data = orjson.loads(view)
+            else:
+                data = json.loads(f.read())
         
         logger.info(f"Loaded processed data from {input_path}")
         return data
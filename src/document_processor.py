@@ -1,19 +1,79 @@
 """Document processing module using Google Document AI."""
 
 import os
+import re
 from google.cloud import documentai_v1 as documentai
 from google.api_core.client_options import ClientOptions
+from google.api_core import exceptions as core_exceptions
+from google.api_core.retry import Retry, if_exception_type
 import logging
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
-import datetime
-import mimetypes
+import hashlib
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from google.auth import default
-from google.protobuf.json_format import MessageToDict
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder when orjson is unavailable
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# First number in an amount string, e.g. "€1234.56" -> "1234.56"
+AMOUNT_PATTERN = re.compile(r'\d+\.?\d*')
+
+# Entity type keywords -> parsed field, checked in order (first match wins)
+RECEIPT_FIELDS = (
+    (('receipt_date', 'date'), 'receipt_date'),
+    (('total_amount', 'total'), 'total_amount'),
+    (('supplier_name', 'vendor'), 'vendor_name'),
+    (('supplier_address', 'address'), 'vendor_address'),
+    (('line_item',), 'line_items')
+)
+
+PAYSLIP_FIELDS = (
+    (('employee_name', 'name'), 'employee_name'),
+    (('employer_name', 'company'), 'employer_name'),
+    (('pay_period', 'period'), 'pay_period'),
+    (('gross_pay', 'gross'), 'gross_pay'),
+    (('net_pay', 'net'), 'net_pay'),
+    (('deduction',), 'deductions')
+)
+
+# Parsed fields holding a numeric amount extracted from the mention text
+AMOUNT_FIELDS = {'total_amount', 'gross_pay', 'net_pay'}
+
+# MIME types for the document formats accepted by Document AI
+MIME_TYPES = {
+    '.pdf': 'application/pdf',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.tif': 'image/tiff',
+    '.tiff': 'image/tiff',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.webp': 'image/webp'
+}
+
+# Back off exponentially when Document AI rate-limits or times out under concurrent load
+DOCUMENT_AI_RETRY = Retry(
+    predicate=if_exception_type(
+        core_exceptions.ResourceExhausted,
+        core_exceptions.DeadlineExceeded,
+        core_exceptions.ServiceUnavailable
+    ),
+    initial=1.0,
+    multiplier=2.0,
+    maximum=30.0,
+    timeout=180.0,
+    on_error=lambda e: logger.warning(f"Document AI request failed, retrying: {e}")
+)
+
 class DocumentProcessor:
     """Document processor using Google Document AI."""
     
@@ -41,86 +101,120 @@ class DocumentProcessor:
             client_options=client_options,
             credentials=credentials
         )        
-        # Build processor names using the proper method
-        self.receipt_processor_name = self.client.processor_path(
-            self.project_id,
-            self.config.document_ai_location,
-            self.config.receipt_processor_id
-        )
-        
-        self.payslip_processor_name = self.client.processor_path(
-            self.project_id,
-            self.config.document_ai_location,
-            self.config.income_statement_processor_id
-        )
-        
-        self.occupation_processor_name = self.client.processor_path(
-            self.project_id,
-            self.config.document_ai_location,
-            self.config.occupation_category_processor_id
-        )
+        # Build processor resource names
+        self.receipt_processor_name = self._build_processor_name(self.config.receipt_processor_id)
+        self.payslip_processor_name = self._build_processor_name(self.config.income_statement_processor_id)
+        self.occupation_processor_name = self._build_processor_name(self.config.occupation_category_processor_id)
+    
+    def _build_processor_name(self, processor_id: str) -> str:
+        """Build the fully-qualified Document AI processor resource name."""
+        return f"projects/{self.project_id}/locations/{self.config.document_ai_location}/processors/{processor_id}"
     
     def _get_mime_type(self, file_path: Path) -> str:
         """Determine MIME type based on file extension."""
-        mime_type, _ = mimetypes.guess_type(str(file_path))
-        if mime_type is None:
-            # Default based on file extension
-            extension = file_path.suffix.lower()
-            if extension in ['.jpg', '.jpeg']:
-                mime_type = 'image/jpeg'
-            elif extension == '.png':
-                mime_type = 'image/png'
-            elif extension in ['.tif', '.tiff']:
-                mime_type = 'image/tiff'
-            else:
-                mime_type = 'application/pdf'
-        return mime_type
+        return MIME_TYPES.get(file_path.suffix.lower(), 'application/pdf')
+    
+    def _list_files(self, dir_path: Path, extensions: set) -> List[Path]:
+        """List files in a directory with one of the given suffixes, sorted by name."""
+        with os.scandir(dir_path) as entries:
+            files = [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+            ]
+        return sorted(files)
+    
+    def _get_cache_path(self, file_content: bytes, processor_name: str) -> Path:
+        """Build the OCR cache file path for the given file bytes and processor."""
+        # Length-prefix the content so (content, processor) pairs can't collide by concatenation;
+        # entries with and without the full OCR text are kept apart
+        variant = b'+full_text' if self.config.include_full_text else b''
+        digest = hashlib.sha256(
+            len(file_content).to_bytes(8, 'little') + file_content + processor_name.encode() + variant
+        ).hexdigest()
+        return self.config.ocr_cache_dir / f"{digest}.json"
+    
+    def _write_cache(self, cache_path: Path, data: Dict[str, Any]):
+        """Atomically write a cache entry so concurrent or interrupted runs never see partial JSON.
+        
+        Failures are logged and swallowed so a disk error never discards a successful OCR result.
+        """
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(data) if orjson is not None else json.dumps(data).encode())
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write cache entry {cache_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def _read_cache(self, cache_path: Path) -> Optional[Dict[str, Any]]:
+        """Load a cache entry written by _write_cache.
+        
+        Returns None when there is no entry; a corrupt entry is deleted so the document is processed again.
+        """
+        if not cache_path.exists():
+            return None
+        raw = cache_path.read_bytes()
+        try:
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except ValueError as e:
+            logger.warning(f"Discarding corrupt cache entry {cache_path}: {e}")
+            cache_path.unlink(missing_ok=True)
+            return None
     
     def _serialize_document_entities(self, document: documentai.Document) -> Dict[str, Any]:
         """Convert Document AI entities to a serializable dictionary."""
         result = {}
         
         for entity in document.entities:
+            normalized_value = entity.normalized_value
             entity_data = {
                 "confidence": entity.confidence,
                 "mention_text": entity.mention_text,
-                "normalized_value": entity.normalized_value.text if entity.normalized_value else None
+                "normalized_value": normalized_value.text if normalized_value else None
             }
             
             # Handle nested entities if they exist
-            if entity.properties:
-                entity_data["properties"] = {}
-                for prop in entity.properties:
-                    entity_data["properties"][prop.type_] = {
+            properties = entity.properties
+            if properties:
+                entity_data["properties"] = {
+                    prop.type_: {
                         "confidence": prop.confidence,
                         "mention_text": prop.mention_text,
                         "normalized_value": prop.normalized_value.text if prop.normalized_value else None
                     }
+                    for prop in properties
+                }
             
-            # Use entity type as key or append to list if multiple entities of same type
-            if entity.type_ in result:
-                if not isinstance(result[entity.type_], list):
-                    result[entity.type_] = [result[entity.type_]]
-                result[entity.type_].append(entity_data)
-            else:
-                result[entity.type_] = entity_data                
+            # Group entities by type; every type maps to a list of its entities
+            result.setdefault(entity.type_, []).append(entity_data)
         return result
     
-    def process_document(self, file_path: Path, processor_name: str) -> Dict[str, Any]:
+    def process_document(self, file_path: Path, processor_name: str,
+                         file_content: Optional[bytes] = None) -> Dict[str, Any]:
         """
         Process a single document using Document AI.
         
         Args:
             file_path: Path to the document file
             processor_name: Document AI processor name
+            file_content: Already-read file bytes; read from file_path when omitted
             
         Returns:
             Extracted document data
         """
         try:
             # Read the file
-            with open(file_path, "rb") as file:
-                file_content = file.read()
+            if file_content is None:
+                file_content = file_path.read_bytes()
+            
+            # Reuse the stored response if these exact bytes were already processed
+            cache_path = self._get_cache_path(file_content, processor_name)
+            extracted_data = self._read_cache(cache_path)
+            if extracted_data is not None:
+                extracted_data["_metadata"]["file_name"] = file_path.name
+                logger.info(f"Loaded cached Document AI result for {file_path.name}")
+                return extracted_data
             
             # Determine MIME type
             mime_type = self._get_mime_type(file_path)
@@ -136,7 +230,7 @@ class DocumentProcessor:
             
             # Process the document
             logger.info(f"Calling Document AI endpoint: {processor_name}")
-            response = self.client.process_document(request=request, timeout=30)
+            response = self.client.process_document(request=request, retry=DOCUMENT_AI_RETRY, timeout=30)
             document = response.document
             
             # Extract structured data using the proven method
@@ -144,14 +238,21 @@ class DocumentProcessor:
             
             # Add metadata
             extracted_data["_metadata"] = {
-                "processed_at": datetime.datetime.now().isoformat(),
+                "processed_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
                 "file_name": file_path.name,
                 "mime_type": mime_type,
                 "page_count": len(document.pages),
-                "full_text": document.text
+                "text_length": len(document.text)
             }
+            # The full OCR transcript is only kept when explicitly requested
+            if self.config.include_full_text:
+                extracted_data["_metadata"]["full_text"] = document.text
             
             logger.info(f"Processed document {file_path.name}: {len(extracted_data)} entity types extracted")
+            
+            # Cache the successful response for subsequent runs
+            self._write_cache(cache_path, extracted_data)
+            
             return extracted_data
             
         except Exception as e:
@@ -160,31 +261,41 @@ class DocumentProcessor:
                 '_metadata': {
                     'file_name': file_path.name,
                     'error': str(e),
-                    'processed_at': datetime.datetime.now().isoformat()
+                    'processed_at': datetime.now(timezone.utc).isoformat(timespec='seconds')
                 }
             }
     
-    def process_for_occupation(self, file_path: Path) -> Dict[str, Any]:
+    def process_for_occupation(self, file_path: Path,
+                               file_content: Optional[bytes] = None) -> Dict[str, Any]:
         """
         Process a document specifically for occupation category information.
         Simply extract Department and Position from document text.
         
         Args:
             file_path: Path to the document file
+            file_content: Already-read file bytes; read from file_path when omitted
             
         Returns:
             Dictionary containing the extracted occupation data
         """
         try:
             # Read the file
-            with open(file_path, "rb") as file:
-                file_content = file.read()
+            if file_content is None:
+                file_content = file_path.read_bytes()
+            
+            # Get processor name
+            processor_name = self.occupation_processor_name
+            
+            # Reuse the stored result if these exact bytes were already processed
+            cache_path = self._get_cache_path(file_content, processor_name)
+            occupation_data = self._read_cache(cache_path)
+            if occupation_data is not None:
+                logger.info(f"Loaded cached occupation result for {file_path.name}")
+                return occupation_data
             
             # Determine MIME type
             mime_type = self._get_mime_type(file_path)
             
-            # Get processor name
-            processor_name = self.occupation_processor_name
             logger.info(f"Calling Occupation Category processor: {processor_name}")
             
             # Configure the process request
@@ -196,14 +307,7 @@ class DocumentProcessor:
             )
             
             # Process the document
-            response = self.client.process_document(request=request, timeout=30)
-            
-            # Convert the entire protobuf response to a dictionary
-            full_response = MessageToDict(
-                response._pb,
-                preserving_proto_field_name=True,
-                use_integers_for_enums=False
-            )
+            response = self.client.process_document(request=request, retry=DOCUMENT_AI_RETRY, timeout=30)
             
             logger.info("Full occupation processor response received")
             
@@ -211,21 +315,23 @@ class DocumentProcessor:
             department = None
             position = None
             
-            # Get the full text from the document
-            if 'document' in full_response and 'text' in full_response['document']:
-                text = full_response['document']['text']
+            # Read the text straight off the response instead of converting the whole message
+            text = response.document.text
+            if text:
                 logger.info(f"First 200 chars of document text: {text[:200]}")
                 
-                # Look for Department and Position in the text
-                lines = text.split('\n')
-                for line in lines:
+                # Look for Department and Position in the text, stopping once both are found
+                for line in text.splitlines():
                     line = line.strip()
                     if line.startswith('Department:'):
-                        department = line.replace('Department:', '').strip()
+                        department = line[len('Department:'):].strip()
                         logger.info(f"Found department: {department}")
                     elif line.startswith('Position:'):
-                        position = line.replace('Position:', '').strip()
+                        position = line[len('Position:'):].strip()
                         logger.info(f"Found position: {position}")
+                    
+                    if department and position:
+                        break
             
             # Create the occupation category
             occupation_category = None
@@ -237,7 +343,7 @@ class DocumentProcessor:
                 occupation_category = position
                 
             # Keep a simplified approach without confidence scores
-            return {
+            occupation_data = {
                 "occupation_category": occupation_category,
                 "occupation_category_confidence": 1.0 if occupation_category else 0.0,
                 "department": department,
@@ -246,6 +352,11 @@ class DocumentProcessor:
                 "position_confidence": 1.0 if position else 0.0
             }
             
+            # Cache the successful result for subsequent runs
+            self._write_cache(cache_path, occupation_data)
+            
+            return occupation_data
+            
         except Exception as e:
             logger.error(f"Error processing document for occupation: {str(e)}")
             return {}
@@ -254,57 +365,73 @@ class DocumentProcessor:
         """
         Process all receipt images.
         
+        Receipts are sent to Document AI concurrently (bounded by
+        ``config.ocr_concurrency``); results keep the sorted file order.
+        
         Returns:
             List of extracted receipt data
         """
-        receipt_files = list(self.config.receipt_dir.glob('*.png')) + \
-                       list(self.config.receipt_dir.glob('*.jpg')) + \
-                       list(self.config.receipt_dir.glob('*.jpeg'))
-        
-        receipt_data = []
-        for file_path in sorted(receipt_files):
-            logger.info(f"Processing receipt: {file_path.name}")
-            data = self.process_document(file_path, self.receipt_processor_name)
-            
-            # Parse receipt-specific data
-            parsed_data = self._parse_receipt_data(data)
-            receipt_data.append(parsed_data)        
+        receipt_files = self._list_files(self.config.receipt_dir, {'.png', '.jpg', '.jpeg'})
+        
+        with ThreadPoolExecutor(max_workers=self.config.ocr_concurrency) as executor:
+            receipt_data = list(executor.map(self._process_receipt, receipt_files))
         return receipt_data
     
+    def _process_receipt(self, file_path: Path) -> Dict[str, Any]:
+        """Process and parse a single receipt image."""
+        logger.info(f"Processing receipt: {file_path.name}")
+        data = self.process_document(file_path, self.receipt_processor_name)
+        
+        # Parse receipt-specific data
+        return self._parse_receipt_data(data)
+    
     def process_payslips(self) -> List[Dict[str, Any]]:
         """
         Process all payslip PDFs.
         
+        Payslips are sent to Document AI concurrently (bounded by
+        ``config.ocr_concurrency``); results keep the sorted file order.
+        
         Returns:
             List of extracted payslip data
         """
-        payslip_files = list(self.config.payslip_dir.glob('*.pdf'))
+        payslip_files = self._list_files(self.config.payslip_dir, {'.pdf'})
         
-        payslip_data = []
-        for file_path in sorted(payslip_files):
-            logger.info(f"Processing payslip: {file_path.name}")
-            
-            # Process with income statement processor
-            logger.info(f"Processing with income statement processor...")
-            income_data = self.process_document(file_path, self.payslip_processor_name)
-            
-            # Process with occupation category processor for department/position
-            logger.info(f"Processing with occupation category processor...")
-            occupation_data = self.process_for_occupation(file_path)
-            
-            # Log processor results
-            logger.info(f"Income processor returned {len(income_data)} entity types")
-            logger.info(f"Occupation processor returned: {occupation_data}")
-            
-            # Check for errors
-            if '_metadata' in income_data and 'error' in income_data['_metadata']:
-                logger.error(f"Income processor error: {income_data['_metadata']['error']}")
-            
-            # Combine and parse data
-            parsed_data = self._parse_payslip_data(income_data, occupation_data)
-            payslip_data.append(parsed_data)        
+        with ThreadPoolExecutor(max_workers=self.config.ocr_concurrency) as executor:
+            payslip_data = list(executor.map(self._process_payslip, payslip_files))
         return payslip_data
     
+    def _process_payslip(self, file_path: Path) -> Dict[str, Any]:
+        """Process and parse a single payslip PDF with both processors."""
+        logger.info(f"Processing payslip: {file_path.name}")
+        
+        # Read the PDF once and hand the same bytes to both processors;
+        # on failure each processor retries the read and reports the error itself
+        try:
+            file_content = file_path.read_bytes()
+        except OSError as e:
+            logger.error(f"Error reading payslip {file_path}: {e}")
+            file_content = None
+        
+        # Process with income statement processor
+        logger.info(f"Processing with income statement processor...")
+        income_data = self.process_document(file_path, self.payslip_processor_name, file_content)
+        
+        # Process with occupation category processor for department/position
+        logger.info(f"Processing with occupation category processor...")
+        occupation_data = self.process_for_occupation(file_path, file_content)
+        
+        # Log processor results
+        logger.info(f"Income processor returned {len(income_data)} entity types")
+        logger.info(f"Occupation processor returned: {occupation_data}")
+        
+        # Check for errors
+        if '_metadata' in income_data and 'error' in income_data['_metadata']:
+            logger.error(f"Income processor error: {income_data['_metadata']['error']}")
+        
+        # Combine and parse data
+        return self._parse_payslip_data(income_data, occupation_data)
+    
     def _parse_receipt_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse receipt data from Document AI response.
@@ -322,34 +449,11 @@ class DocumentProcessor:
             'vendor_name': None,
             'vendor_address': None,
             'line_items': [],
-            'raw_entities': self._convert_entities_to_list(raw_data)
+            'raw_entities': []
         }
         
         # Extract key information from serialized entities
-        for entity_type, entity_data in raw_data.items():
-            if entity_type.startswith('_'):  # Skip metadata
-                continue
-                
-            # Handle both single entity and list of entities
-            entities = entity_data if isinstance(entity_data, list) else [entity_data]
-            
-            for entity in entities:
-                if not isinstance(entity, dict):
-                    continue
-                    
-                mention_text = entity.get('mention_text', '')
-                entity_type_lower = entity_type.lower()
-                
-                if 'receipt_date' in entity_type_lower or 'date' in entity_type_lower:
-                    parsed['receipt_date'] = mention_text
-                elif 'total_amount' in entity_type_lower or 'total' in entity_type_lower:
-                    parsed['total_amount'] = self._extract_amount(mention_text)
-                elif 'supplier_name' in entity_type_lower or 'vendor' in entity_type_lower:
-                    parsed['vendor_name'] = mention_text
-                elif 'supplier_address' in entity_type_lower or 'address' in entity_type_lower:
-                    parsed['vendor_address'] = mention_text
-                elif 'line_item' in entity_type_lower:
-                    parsed['line_items'].append(mention_text)        
+        parsed['raw_entities'] = self._assign_entity_fields(parsed, raw_data, RECEIPT_FIELDS)
         return parsed
     
     def _parse_payslip_data(self, income_data: Dict[str, Any], 
@@ -381,61 +485,71 @@ class DocumentProcessor:
             'deductions': [],
             'position': occupation_data.get('position'),
             'department': occupation_data.get('department'),
-            'raw_income_entities': self._convert_entities_to_list(income_data),
+            'raw_income_entities': [],
             'raw_occupation_entities': [occupation_data] if occupation_data else []
         }
         
         # Extract income information from serialized entities
-        for entity_type, entity_data in income_data.items():
+        parsed['raw_income_entities'] = self._assign_entity_fields(parsed, income_data, PAYSLIP_FIELDS)
+        
+        logger.info(f"Final parsed position: {parsed['position']}, department: {parsed['department']}")
+        return parsed
+    
+    def _assign_entity_fields(self, parsed: Dict[str, Any], raw_data: Dict[str, Any],
+                              field_table: tuple) -> List[Dict[str, Any]]:
+        """
+        Copy entity mentions into the parsed fields they map to.
+        
+        The target field is resolved once per entity type from the first
+        matching keyword group in ``field_table``; amount fields are parsed
+        as numbers and list fields collect every mention. The same pass
+        also flattens all entities into the list format kept for reference.
+        
+        Args:
+            parsed: Parsed document dictionary to fill in
+            raw_data: Serialized Document AI entities
+            field_table: Ordered (keywords, field) pairs
+            
+        Returns:
+            List of all entities with their type, text and confidence
+        """
+        raw_entities = []
+        for entity_type, entity_data in raw_data.items():
             if entity_type.startswith('_'):  # Skip metadata
                 continue
-                
+            
+            entity_type_lower = entity_type.lower()
+            field = next(
+                (field for keywords, field in field_table
+                 if any(keyword in entity_type_lower for keyword in keywords)),
+                None
+            )
+            
             # Handle both single entity and list of entities
             entities = entity_data if isinstance(entity_data, list) else [entity_data]
             
             for entity in entities:
                 if not isinstance(entity, dict):
                     continue
-                    
+                
                 mention_text = entity.get('mention_text', '')
-                entity_type_lower = entity_type.lower()
+                raw_entities.append({
+                    'type': entity_type,
+                    'mention_text': mention_text,
+                    'confidence': entity.get('confidence', 0.0),
+                    'normalized_value': entity.get('normalized_value')
+                })
                 
-                if 'employee_name' in entity_type_lower or 'name' in entity_type_lower:
-                    parsed['employee_name'] = mention_text
-                elif 'employer_name' in entity_type_lower or 'company' in entity_type_lower:
-                    parsed['employer_name'] = mention_text
-                elif 'pay_period' in entity_type_lower or 'period' in entity_type_lower:
-                    parsed['pay_period'] = mention_text
-                elif 'gross_pay' in entity_type_lower or 'gross' in entity_type_lower:
-                    parsed['gross_pay'] = self._extract_amount(mention_text)
-                elif 'net_pay' in entity_type_lower or 'net' in entity_type_lower:
-                    parsed['net_pay'] = self._extract_amount(mention_text)
-                elif 'deduction' in entity_type_lower:
-                    parsed['deductions'].append(mention_text)
+                if field is None:
+                    continue
+                if field in AMOUNT_FIELDS:
+                    parsed[field] = self._extract_amount(mention_text)
+                elif isinstance(parsed[field], list):
+                    parsed[field].append(mention_text)
+                else:
+                    parsed[field] = mention_text
         
-        logger.info(f"Final parsed position: {parsed['position']}, department: {parsed['department']}")
-        return parsed
-    
-    def _convert_entities_to_list(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Convert the serialized entities back to a list format for compatibility."""
-        entities = []
-        for entity_type, entity_data in data.items():
-            if entity_type.startswith('_'):  # Skip metadata
-                continue
-                
-            # Handle both single entity and list of entities
-            entity_list = entity_data if isinstance(entity_data, list) else [entity_data]
-            
-            for entity in entity_list:
-                if isinstance(entity, dict):
-                    entities.append({
-                        'type': entity_type,
-                        'mention_text': entity.get('mention_text', ''),
-                        'confidence': entity.get('confidence', 0.0),
-                        'normalized_value': entity.get('normalized_value')
-                    })
-        
-        return entities
+        return raw_entities
     
     def _extract_amount(self, text: str) -> float:
         """
@@ -447,14 +561,12 @@ class DocumentProcessor:
         Returns:
             Extracted amount as float
         """
-        import re
+        if not text:
+            return 0.0
         
-        # Remove currency symbols and extract numbers
-        amount_match = re.search(r'[\d,]+\.?\d*', text.replace(',', ''))
+        # Drop thousands separators and extract the first number
+        amount_match = AMOUNT_PATTERN.search(text.replace(',', ''))
         if amount_match:
-            try:
-                return float(amount_match.group())
-            except ValueError:
-                pass
+            return float(amount_match.group())
         
         return 0.0
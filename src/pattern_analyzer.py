@@ -6,16 +6,29 @@ from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import logging
+import os
+import pickle
+import hashlib
 from typing import Dict, List, Any, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Resolution of the saved pattern charts
+VISUALIZATION_DPI = 150
+
+# Chart files written by _create_visualizations
+VISUALIZATION_FILES = ('category_spending.png', 'demographic_analysis.png', 'seasonal_patterns.png')
+
+# Fingerprint of this module's source, so cached patterns are invalidated by code changes
+SOURCE_FINGERPRINT = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
 class PatternAnalyzer:
     """Pattern analyzer for tax data and transactions."""
     
@@ -42,6 +55,28 @@ class PatternAnalyzer:
         """
         logger.info("Starting comprehensive pattern analysis...")
         
+        cache_path = None
+        if self.config.cache_results:
+            cache_path = self._get_cache_path(
+                transactions_df, users_df, tax_filings_df, receipt_data, payslip_data
+            )
+            if cache_path.exists():
+                with open(cache_path, 'rb') as f:
+                    self.patterns = pickle.load(f)
+                logger.info(f"Loaded cached pattern analysis from {cache_path}")
+                
+                # Charts are not cached; redraw them if any were removed
+                viz_dir = self.config.results_dir / 'visualizations'
+                if not all((viz_dir / name).exists() for name in VISUALIZATION_FILES):
+                    transactions_df, users_df, user_transactions = self._prepare_frames(transactions_df, users_df)
+                    self._create_visualizations(self.patterns, transactions_df, user_transactions)
+                return self.patterns
+        
+        transactions_df, users_df, user_transactions = self._prepare_frames(transactions_df, users_df)
+        
+        # Spending per (user, category), shared by the tax optimization and deduction analyses
+        user_category_spending = transactions_df.groupby(['user_id', 'category'], observed=True)['amount'].sum()
+        
         patterns = {}
         
         # 1. Transaction patterns
@@ -49,12 +84,12 @@ class PatternAnalyzer:
         
         # 2. User demographic patterns
         patterns['demographic_patterns'] = self._analyze_demographic_patterns(
-            users_df, transactions_df, tax_filings_df
+            users_df, user_transactions, tax_filings_df
         )
         
         # 3. Tax optimization patterns
         patterns['tax_optimization_patterns'] = self._analyze_tax_optimization_patterns(
-            transactions_df, tax_filings_df, users_df
+            user_category_spending, tax_filings_df, users_df
         )
         
         # 4. Seasonal patterns
@@ -70,22 +105,66 @@ class PatternAnalyzer:
         
         # 7. Deduction opportunity patterns
         patterns['deduction_opportunities'] = self._identify_deduction_opportunities(
-            transactions_df, users_df
+            user_category_spending, users_df
         )
         
         # Generate visualizations
-        self._create_visualizations(patterns, transactions_df, users_df, tax_filings_df)
+        self._create_visualizations(patterns, transactions_df, user_transactions)
         
         self.patterns = patterns
+        if cache_path is not None:
+            self._write_cache(cache_path, patterns)
         logger.info("Pattern analysis completed successfully")
         
         return patterns
     
+    def _prepare_frames(self, transactions_df: pd.DataFrame,
+                        users_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Derive the typed frames and calendar features shared by the analyses and charts."""
+        # Low-cardinality string columns as categoricals so groupbys hash integer codes;
+        # astype returns new frames, so the caller's data is left untouched
+        transactions_df = transactions_df.astype({'category': 'category', 'vendor': 'category'})
+        users_df = users_df.astype({
+            column: 'category'
+            for column in ['occupation_category', 'age_range', 'family_status', 'region']
+            if column in users_df.columns
+        })
+        
+        # Calendar features derived once and shared by the analyses below (int8 is enough for 1-12)
+        transactions_df['month'] = transactions_df['transaction_date'].dt.month.astype('int8')
+        transactions_df['quarter'] = transactions_df['transaction_date'].dt.quarter.astype('int8')
+        
+        # Transactions joined with demographics, shared by the demographic analysis and charts
+        user_transactions = transactions_df.merge(users_df, on='user_id')
+        
+        return transactions_df, users_df, user_transactions
+    
+    def _get_cache_path(self, transactions_df: pd.DataFrame, users_df: pd.DataFrame,
+                        tax_filings_df: pd.DataFrame, receipt_data: List[Dict],
+                        payslip_data: List[Dict]) -> Path:
+        """Build the pattern cache file path for the given input data, analyzer code and settings."""
+        digest = hashlib.sha256()
+        digest.update(SOURCE_FINGERPRINT.encode())
+        digest.update(repr(self.config.kmeans_n_init).encode())
+        for df in (transactions_df, users_df, tax_filings_df):
+            # Column names and dtypes are part of the key so schema changes miss the cache
+            digest.update(repr(list(df.dtypes.items())).encode())
+            digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        digest.update(pickle.dumps((receipt_data, payslip_data)))
+        return self.config.patterns_cache_dir / f"{digest.hexdigest()}.pkl"
+    
+    def _write_cache(self, cache_path: Path, patterns: Dict[str, Any]):
+        """Atomically write a cache entry so interrupted runs never leave a partial pickle."""
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(patterns, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    
     def _analyze_transaction_patterns(self, transactions_df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze transaction patterns."""
         patterns = {}
           # Category distribution
-        category_stats = transactions_df.groupby('category').agg({
+        category_stats = transactions_df.groupby('category', observed=True).agg({
             'amount': ['count', 'sum', 'mean', 'std'],
             'user_id': 'nunique'
         }).round(2)
@@ -95,39 +174,45 @@ class PatternAnalyzer:
         patterns['category_statistics'] = category_stats.to_dict()
         
         # Monthly spending patterns
-        transactions_df['month'] = transactions_df['transaction_date'].dt.month
         monthly_spending = transactions_df.groupby(['user_id', 'month'])['amount'].sum().reset_index()
         patterns['monthly_spending_variance'] = monthly_spending.groupby('user_id')['amount'].std().to_dict()
         
         # Top vendors by category
-        top_vendors = transactions_df.groupby(['category', 'vendor'])['amount'].sum().reset_index()
-        patterns['top_vendors_by_category'] = {}
-        for category in transactions_df['category'].unique():
-            category_vendors = top_vendors[top_vendors['category'] == category].nlargest(5, 'amount')
-            patterns['top_vendors_by_category'][category] = category_vendors.to_dict('records')
+        top_vendors = (
+            transactions_df.groupby(['category', 'vendor'], observed=True)['amount'].sum().reset_index()
+            .sort_values('amount', ascending=False, kind='stable')
+            .groupby('category', observed=True).head(5)
+        )
+        vendors_by_category = {
+            category: category_vendors.to_dict('records')
+            for category, category_vendors in top_vendors.groupby('category', observed=True)
+        }
+        patterns['top_vendors_by_category'] = {
+            category: vendors_by_category.get(category, [])
+            for category in transactions_df['category'].unique()
+        }
         
         # Repeat transaction patterns
-        repeat_transactions = transactions_df.groupby(['user_id', 'vendor', 'category']).size().reset_index(name='frequency')
+        repeat_transactions = transactions_df.groupby(['user_id', 'vendor', 'category'], observed=True).size().reset_index(name='frequency')
         patterns['repeat_transaction_patterns'] = repeat_transactions[repeat_transactions['frequency'] > 3].to_dict('records')
         
         return patterns
     
     def _analyze_demographic_patterns(self, users_df: pd.DataFrame, 
-                                    transactions_df: pd.DataFrame, 
+                                    user_transactions: pd.DataFrame, 
                                     tax_filings_df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze demographic patterns."""
         patterns = {}
         
         # Merge data for analysis
-        user_transactions = transactions_df.merge(users_df, on='user_id')
         user_tax_data = tax_filings_df.merge(users_df, on='user_id')
           # Spending by occupation
-        occupation_spending = user_transactions.groupby('occupation_category')['amount'].agg(['sum', 'mean', 'count']).round(2)
+        occupation_spending = user_transactions.groupby('occupation_category', observed=True)['amount'].agg(['sum', 'mean', 'count']).round(2)
         occupation_spending.columns = ['amount_sum', 'amount_mean', 'amount_count']
         patterns['spending_by_occupation'] = occupation_spending.to_dict()
         
         # Deduction patterns by demographics
-        deduction_patterns = user_tax_data.groupby(['occupation_category', 'family_status']).agg({
+        deduction_patterns = user_tax_data.groupby(['occupation_category', 'family_status'], observed=True).agg({
             'total_deductions': ['mean', 'std'],
             'refund_amount': ['mean', 'std']
         }).round(2)
@@ -135,7 +220,7 @@ class PatternAnalyzer:
         patterns['deduction_by_demographics'] = deduction_patterns.to_dict()
         
         # Regional patterns
-        regional_patterns = user_tax_data.groupby('region').agg({
+        regional_patterns = user_tax_data.groupby('region', observed=True).agg({
             'total_income': 'mean',
             'total_deductions': 'mean',
             'refund_amount': 'mean'
@@ -143,12 +228,12 @@ class PatternAnalyzer:
         patterns['regional_patterns'] = regional_patterns.to_dict()
         
         # Age group patterns
-        age_patterns = user_transactions.groupby(['age_range', 'category'])['amount'].sum().reset_index()
+        age_patterns = user_transactions.groupby(['age_range', 'category'], observed=True)['amount'].sum().reset_index()
         patterns['spending_by_age_category'] = age_patterns.to_dict('records')
         
         return patterns
     
-    def _analyze_tax_optimization_patterns(self, transactions_df: pd.DataFrame,
+    def _analyze_tax_optimization_patterns(self, user_category_spending: pd.Series,
                                          tax_filings_df: pd.DataFrame,
                                          users_df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze tax optimization patterns."""
@@ -161,9 +246,9 @@ class PatternAnalyzer:
         ]
         
         # User deductible spending
-        user_deductible = transactions_df[
-            transactions_df['category'].isin(deductible_categories)
-        ].groupby('user_id')['amount'].sum().reset_index()
+        user_deductible = user_category_spending[
+            user_category_spending.index.get_level_values('category').isin(deductible_categories)
+        ].groupby(level='user_id').sum().reset_index()
         user_deductible.columns = ['user_id', 'potential_deductions']
         
         # Merge with actual deductions
@@ -171,18 +256,18 @@ class PatternAnalyzer:
         tax_comparison['potential_deductions'] = tax_comparison['potential_deductions'].fillna(0)
         tax_comparison['deduction_gap'] = tax_comparison['potential_deductions'] - tax_comparison['total_deductions']
         
+        # Reduce the gap column directly instead of materializing filtered frames
+        deduction_gap = tax_comparison['deduction_gap']
         patterns['deduction_gap_analysis'] = {
-            'users_with_gap': len(tax_comparison[tax_comparison['deduction_gap'] > 100]),
-            'average_gap': tax_comparison['deduction_gap'].mean(),
-            'max_gap': tax_comparison['deduction_gap'].max(),
-            'total_missed_deductions': tax_comparison[tax_comparison['deduction_gap'] > 0]['deduction_gap'].sum()
+            'users_with_gap': int((deduction_gap > 100).sum()),
+            'average_gap': deduction_gap.mean(),
+            'max_gap': deduction_gap.max(),
+            'total_missed_deductions': deduction_gap.clip(lower=0).sum()
         }
         
-        # Efficiency ratios
-        tax_comparison['deduction_efficiency'] = (
-            tax_comparison['total_deductions'] / tax_comparison['total_income'] * 100
-        ).round(2)
-        patterns['deduction_efficiency'] = tax_comparison['deduction_efficiency'].describe().to_dict()
+        # Efficiency ratios, rounded once on the summary rather than per filing
+        deduction_efficiency = tax_comparison['total_deductions'] / tax_comparison['total_income'] * 100
+        patterns['deduction_efficiency'] = deduction_efficiency.describe().round(2).to_dict()
         
         return patterns
     
@@ -190,34 +275,26 @@ class PatternAnalyzer:
         """Analyze seasonal spending patterns."""
         patterns = {}
         
-        # Add time features
-        transactions_df['month'] = transactions_df['transaction_date'].dt.month
-        transactions_df['quarter'] = transactions_df['transaction_date'].dt.quarter
-        transactions_df['year'] = transactions_df['transaction_date'].dt.year
-        
         # Monthly patterns by category
-        monthly_category = transactions_df.groupby(['month', 'category'])['amount'].sum().reset_index()
+        monthly_category = transactions_df.groupby(['month', 'category'], observed=True)['amount'].sum().reset_index()
         patterns['monthly_category_spending'] = monthly_category.to_dict('records')
           # Quarterly patterns
         quarterly_spending = transactions_df.groupby('quarter')['amount'].agg(['sum', 'mean', 'count']).round(2)
         quarterly_spending.columns = ['amount_sum', 'amount_mean', 'amount_count']
         patterns['quarterly_patterns'] = quarterly_spending.to_dict()
         
-        # Year-end spending spikes
-        december_spending = transactions_df[transactions_df['month'] == 12]
-        november_spending = transactions_df[transactions_df['month'] == 11]
+        # Year-end spending spikes, summed from reusable boolean masks without filtered frame copies
+        amounts = transactions_df['amount']
+        months = transactions_df['month'].to_numpy()
+        charitable = (transactions_df['category'] == 'Charitable Donations').to_numpy()
         
         patterns['year_end_patterns'] = {
-            'december_charitable_donations': december_spending[
-                december_spending['category'] == 'Charitable Donations'
-            ]['amount'].sum(),
-            'november_charitable_donations': november_spending[
-                november_spending['category'] == 'Charitable Donations'
-            ]['amount'].sum(),
-            'medical_q4_spending': transactions_df[
-                (transactions_df['quarter'] == 4) & 
-                (transactions_df['category'] == 'Medical')
-            ]['amount'].sum()
+            'december_charitable_donations': amounts[charitable & (months == 12)].sum(),
+            'november_charitable_donations': amounts[charitable & (months == 11)].sum(),
+            'medical_q4_spending': amounts[
+                (transactions_df['category'] == 'Medical').to_numpy() &
+                (transactions_df['quarter'].to_numpy() == 4)
+            ].sum()
         }
         
         return patterns
@@ -229,39 +306,66 @@ class PatternAnalyzer:
         
         # Receipt patterns
         if receipt_data:
-            receipt_amounts = [r.get('total_amount', 0) for r in receipt_data if r.get('total_amount')]
+            receipt_total = 0
+            receipts_with_amounts = 0
+            vendors = {}
+            for receipt in receipt_data:
+                amount = receipt.get('total_amount')
+                if amount:
+                    receipt_total += amount
+                    receipts_with_amounts += 1
+                vendor = receipt.get('vendor_name')
+                if vendor:
+                    vendors[vendor] = None
+            
             patterns['receipt_analysis'] = {
                 'total_receipts': len(receipt_data),
-                'receipts_with_amounts': len(receipt_amounts),
-                'average_receipt_amount': np.mean(receipt_amounts) if receipt_amounts else 0,
-                'total_receipt_value': sum(receipt_amounts)
+                'receipts_with_amounts': receipts_with_amounts,
+                'average_receipt_amount': receipt_total / receipts_with_amounts if receipts_with_amounts else 0,
+                'total_receipt_value': receipt_total
             }
             
             # Vendor patterns in receipts
-            vendors = [r.get('vendor_name') for r in receipt_data if r.get('vendor_name')]
-            patterns['receipt_vendors'] = list(set(vendors))
+            patterns['receipt_vendors'] = list(vendors)
         
         # Payslip patterns
         if payslip_data:
-            gross_pays = [p.get('gross_pay', 0) for p in payslip_data if p.get('gross_pay')]
-            net_pays = [p.get('net_pay', 0) for p in payslip_data if p.get('net_pay')]
+            gross_total = net_total = 0
+            gross_count = net_count = 0
+            positions = {}
+            departments = {}
+            for payslip in payslip_data:
+                gross_pay = payslip.get('gross_pay')
+                if gross_pay:
+                    gross_total += gross_pay
+                    gross_count += 1
+                net_pay = payslip.get('net_pay')
+                if net_pay:
+                    net_total += net_pay
+                    net_count += 1
+                position = payslip.get('position')
+                if position:
+                    positions[position] = None
+                department = payslip.get('department')
+                if department:
+                    departments[department] = None
             
+            average_gross_pay = gross_total / gross_count if gross_count else 0
+            average_net_pay = net_total / net_count if net_count else 0
             patterns['payslip_analysis'] = {
                 'total_payslips': len(payslip_data),
-                'average_gross_pay': np.mean(gross_pays) if gross_pays else 0,
-                'average_net_pay': np.mean(net_pays) if net_pays else 0,
+                'average_gross_pay': average_gross_pay,
+                'average_net_pay': average_net_pay,
                 'average_deduction_rate': (
-                    (np.mean(gross_pays) - np.mean(net_pays)) / np.mean(gross_pays) * 100
-                    if gross_pays and net_pays else 0
+                    (average_gross_pay - average_net_pay) / average_gross_pay * 100
+                    if gross_count and net_count else 0
                 )
             }
             
             # Position and department patterns
-            positions = [p.get('position') for p in payslip_data if p.get('position')]
-            departments = [p.get('department') for p in payslip_data if p.get('department')]
             patterns['employment_patterns'] = {
-                'positions': list(set(positions)),
-                'departments': list(set(departments))
+                'positions': list(positions),
+                'departments': list(departments)
             }
         
         return patterns
@@ -284,7 +388,7 @@ class PatternAnalyzer:
         X_scaled = scaler.fit_transform(user_features.select_dtypes(include=[np.number]))
           # Perform K-means clustering
         n_clusters = min(4, len(user_features))  # Ensure we don't have more clusters than users
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=self.config.kmeans_n_init)
         clusters = kmeans.fit_predict(X_scaled)
         
         user_features['cluster'] = clusters
@@ -309,32 +413,24 @@ class PatternAnalyzer:
                                   tax_filings_df: pd.DataFrame) -> pd.DataFrame:
         """Create feature matrix for user clustering."""
         # User spending patterns
-        user_spending = transactions_df.groupby('user_id').agg({
-            'amount': ['sum', 'mean', 'count'],
-            'category': lambda x: len(x.unique())
-        }).round(2)
-        
-        # Flatten MultiIndex columns to avoid tuple keys
-        user_spending.columns = ['_'.join(col).strip() if isinstance(col, tuple) else col for col in user_spending.columns.values]
-        user_spending.columns = ['total_spending', 'avg_transaction', 'transaction_count', 'category_diversity']
-        user_spending = user_spending.reset_index()
-        
-        # Category spending percentages
-        category_spending = transactions_df.groupby(['user_id', 'category'])['amount'].sum().unstack(fill_value=0)
-        category_percentages = category_spending.div(category_spending.sum(axis=1), axis=0) * 100
-        category_percentages = category_percentages.reset_index()
+        user_spending = transactions_df.groupby('user_id').agg(
+            total_spending=('amount', 'sum'),
+            avg_transaction=('amount', 'mean'),
+            transaction_count=('amount', 'count'),
+            category_diversity=('category', 'nunique')
+        ).reset_index()
         
         # Merge with user data
         user_features = user_spending.merge(users_df, on='user_id')
         user_features = user_features.merge(tax_filings_df[['user_id', 'total_income', 'total_deductions']], on='user_id')
         
         # Add derived features
-        user_features['deduction_rate'] = (user_features['total_deductions'] / user_features['total_income'] * 100).round(2)
-        user_features['spending_rate'] = (user_features['total_spending'] / user_features['total_income'] * 100).round(2)
+        user_features['deduction_rate'] = user_features['total_deductions'] / user_features['total_income'] * 100
+        user_features['spending_rate'] = user_features['total_spending'] / user_features['total_income'] * 100
         
         return user_features
     
-    def _identify_deduction_opportunities(self, transactions_df: pd.DataFrame,
+    def _identify_deduction_opportunities(self, user_category_spending: pd.Series,
                                         users_df: pd.DataFrame) -> Dict[str, Any]:
         """Identify deduction opportunities for users."""
         opportunities = {}
@@ -348,94 +444,96 @@ class PatternAnalyzer:
             'Transportation': 0.6  # Assuming business-related transportation
         }
         
+        # Spending per (user, deductible category)
+        deductible_spending = user_category_spending[
+            user_category_spending.index.get_level_values('category').isin(list(deductible_categories))
+        ]
+        deductible_spending = deductible_spending[deductible_spending > 0]
+        
+        spending_by_user = {}
+        for (user_id, category), category_spending in deductible_spending.items():
+            spending_by_user.setdefault(user_id, {})[category] = category_spending
+        
         for user_id in users_df['user_id'].unique():
-            user_transactions = transactions_df[transactions_df['user_id'] == user_id]
-            user_opportunities = {}
-            
-            for category, deduction_rate in deductible_categories.items():
-                category_spending = user_transactions[
-                    user_transactions['category'] == category
-                ]['amount'].sum()
-                
-                if category_spending > 0:
-                    potential_deduction = category_spending * deduction_rate
-                    user_opportunities[category] = {
-                        'total_spending': category_spending,
-                        'potential_deduction': potential_deduction,
-                        'deduction_rate': deduction_rate
-                    }
+            user_spending = spending_by_user.get(user_id)
+            if not user_spending:
+                continue
             
-            if user_opportunities:
-                opportunities[user_id] = user_opportunities
+            opportunities[user_id] = {
+                category: {
+                    'total_spending': user_spending[category],
+                    'potential_deduction': user_spending[category] * deduction_rate,
+                    'deduction_rate': deduction_rate
+                }
+                for category, deduction_rate in deductible_categories.items()
+                if category in user_spending
+            }
         
         return opportunities
     
     def _create_visualizations(self, patterns: Dict[str, Any],
                              transactions_df: pd.DataFrame,
-                             users_df: pd.DataFrame,
-                             tax_filings_df: pd.DataFrame):
+                             user_transactions: pd.DataFrame):
         """Create visualization files for patterns."""
         viz_dir = self.config.results_dir / 'visualizations'
         viz_dir.mkdir(exist_ok=True)
         
-        # Set style
-        plt.style.use('seaborn-v0_8')
-        
-        # 1. Category spending distribution
-        fig, ax = plt.subplots(figsize=(12, 8))
-        category_totals = transactions_df.groupby('category')['amount'].sum().sort_values(ascending=True)
-        category_totals.plot(kind='barh', ax=ax)
-        ax.set_title('Total Spending by Category')
-        ax.set_xlabel('Amount (€)')
-        plt.tight_layout()
-        plt.savefig(viz_dir / 'category_spending.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # 2. User demographic analysis
-        user_data = transactions_df.merge(users_df, on='user_id')
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        
-        # Spending by occupation
-        occupation_spending = user_data.groupby('occupation_category')['amount'].sum()
-        occupation_spending.plot(kind='bar', ax=axes[0,0])
-        axes[0,0].set_title('Spending by Occupation')
-        axes[0,0].tick_params(axis='x', rotation=45)
-        
-        # Spending by region
-        region_spending = user_data.groupby('region')['amount'].sum()
-        region_spending.plot(kind='bar', ax=axes[0,1])
-        axes[0,1].set_title('Spending by Region')
-        
-        # Age group spending
-        age_spending = user_data.groupby('age_range')['amount'].sum()
-        age_spending.plot(kind='bar', ax=axes[1,0])
-        axes[1,0].set_title('Spending by Age Group')
-        
-        # Family status spending
-        family_spending = user_data.groupby('family_status')['amount'].sum()
-        family_spending.plot(kind='bar', ax=axes[1,1])
-        axes[1,1].set_title('Spending by Family Status')
-        axes[1,1].tick_params(axis='x', rotation=45)
-        
-        plt.tight_layout()
-        plt.savefig(viz_dir / 'demographic_analysis.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        # 3. Seasonal patterns
-        transactions_df['month'] = transactions_df['transaction_date'].dt.month
-        monthly_spending = transactions_df.groupby('month')['amount'].sum()
-        
-        fig, ax = plt.subplots(figsize=(12, 6))
-        monthly_spending.plot(kind='line', marker='o', ax=ax)
-        ax.set_title('Monthly Spending Patterns')
-        ax.set_xlabel('Month')
-        ax.set_ylabel('Amount (€)')
-        ax.set_xticks(range(1, 13))
-        ax.set_xticklabels(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                           'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
-        plt.tight_layout()
-        plt.savefig(viz_dir / 'seasonal_patterns.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        # Render off-screen with standalone Figures (no pyplot state or GUI backend);
+        # the style is applied only for the duration of this call
+        with plt.style.context('seaborn-v0_8'):
+            # 1. Category spending distribution
+            fig = Figure(figsize=(12, 8))
+            ax = fig.subplots()
+            category_totals = transactions_df.groupby('category', observed=True)['amount'].sum().sort_values(ascending=True)
+            category_totals.plot(kind='barh', ax=ax)
+            ax.set_title('Total Spending by Category')
+            ax.set_xlabel('Amount (€)')
+            fig.tight_layout()
+            fig.savefig(viz_dir / 'category_spending.png', dpi=VISUALIZATION_DPI)
+            
+            # 2. User demographic analysis
+            fig = Figure(figsize=(15, 12))
+            axes = fig.subplots(2, 2)
+            
+            # Spending by occupation
+            occupation_spending = user_transactions.groupby('occupation_category', observed=True)['amount'].sum()
+            occupation_spending.plot(kind='bar', ax=axes[0,0])
+            axes[0,0].set_title('Spending by Occupation')
+            axes[0,0].tick_params(axis='x', rotation=45)
+            
+            # Spending by region
+            region_spending = user_transactions.groupby('region', observed=True)['amount'].sum()
+            region_spending.plot(kind='bar', ax=axes[0,1])
+            axes[0,1].set_title('Spending by Region')
+            
+            # Age group spending
+            age_spending = user_transactions.groupby('age_range', observed=True)['amount'].sum()
+            age_spending.plot(kind='bar', ax=axes[1,0])
+            axes[1,0].set_title('Spending by Age Group')
+            
+            # Family status spending
+            family_spending = user_transactions.groupby('family_status', observed=True)['amount'].sum()
+            family_spending.plot(kind='bar', ax=axes[1,1])
+            axes[1,1].set_title('Spending by Family Status')
+            axes[1,1].tick_params(axis='x', rotation=45)
+            
+            fig.tight_layout()
+            fig.savefig(viz_dir / 'demographic_analysis.png', dpi=VISUALIZATION_DPI)
+            
+            # 3. Seasonal patterns
+            monthly_spending = transactions_df.groupby('month')['amount'].sum()
+            
+            fig = Figure(figsize=(12, 6))
+            ax = fig.subplots()
+            monthly_spending.plot(kind='line', marker='o', ax=ax)
+            ax.set_title('Monthly Spending Patterns')
+            ax.set_xlabel('Month')
+            ax.set_ylabel('Amount (€)')
+            ax.set_xticks(range(1, 13))
+            ax.set_xticklabels(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
+            fig.tight_layout()
+            fig.savefig(viz_dir / 'seasonal_patterns.png', dpi=VISUALIZATION_DPI)
         
         logger.info(f"Visualizations saved to {viz_dir}")
         
@@ -2,7 +2,11 @@
 import pandas as pd
 import numpy as np
 import faiss
+import torch
 import logging
+import os
+import hashlib
+from functools import cached_property, lru_cache
 from typing import List, Dict, Any, Tuple
 from sentence_transformers import SentenceTransformer
 import weaviate
@@ -11,16 +15,34 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Sentences per forward pass when embedding transactions; descriptions are short, so large batches fit easily
+EMBEDDING_BATCH_SIZE = 256
+
+# Exact search below this many transactions; larger corpora use an HNSW graph for sublinear queries
+HNSW_MIN_TRANSACTIONS = 100_000
+HNSW_NEIGHBORS = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 128
+
+# Number of recent query embeddings kept per engine
+QUERY_CACHE_SIZE = 4096
+
 class SimilaritySearchEngine:
     """Similarity search engine for finding related transactions."""
     
     def __init__(self, config):
         """Initialize similarity search engine."""
         self.config = config
-        self.model = SentenceTransformer(config.embedding_model)
         self.index = None
         self.transaction_embeddings = None
         self.transactions_df = None
+        self._category_positions = {}
+        self._subcategory_positions = {}
+        self._user_ids = None
+        self._gpu_resources = None
+        
+        # Per-engine LRU over query texts, so repeated lookups skip the model
+        self._encode_query = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._encode_query_uncached)
         
         # Initialize Weaviate client
         try:
@@ -34,6 +56,29 @@ class SimilaritySearchEngine:
             logger.warning(f"Weaviate initialization failed: {e}. Using FAISS only.")
             self.weaviate_client = None
     
+    @cached_property
+    def _embedding_device(self) -> str:
+        """Device for the embedding model, chosen without loading the model."""
+        if torch.cuda.is_available():
+            return 'cuda'
+        if torch.backends.mps.is_available():
+            return 'mps'
+        return 'cpu'
+    
+    @property
+    def _embedding_precision(self) -> str:
+        """Precision of the embedding model's forward pass."""
+        return 'float16' if self.config.embedding_fp16 and self._embedding_device == 'cuda' else 'float32'
+    
+    @cached_property
+    def model(self) -> SentenceTransformer:
+        """Sentence embedding model, loaded on first use."""
+        model = SentenceTransformer(self.config.embedding_model, device=self._embedding_device)
+        if self._embedding_precision == 'float16':
+            # Opt-in half precision doubles GPU throughput at a small cost in embedding accuracy
+            model.half()
+        return model
+    
     def _setup_weaviate_schema(self):
         """Setup Weaviate schema for transactions."""
         if not self.weaviate_client:
@@ -65,51 +110,166 @@ class SimilaritySearchEngine:
         """Build similarity search index from transactions."""
         self.transactions_df = transactions_df.copy()
         
+        # Raw user ids by row position, for filtering search hits without pandas lookups
+        self._user_ids = self.transactions_df['user_id'].to_numpy()
+        
+        # Row positions per category (and subcategory), in first-seen order, for filtered lookups
+        self._category_positions = self.transactions_df.groupby('category', sort=False).indices
+        self._subcategory_positions = (
+            self.transactions_df.groupby(['category', 'subcategory'], sort=False).indices
+            if 'subcategory' in self.transactions_df.columns else {}
+        )
+        
         # Create text descriptions for embedding
-        descriptions = []
-        for _, row in transactions_df.iterrows():
-            desc = f"{row['category']} {row.get('subcategory', '')} {row['vendor']} {row['amount']:.2f}€"
-            descriptions.append(desc)
+        descriptions = self._describe_transactions(transactions_df)
         
         # Generate embeddings
         logger.info("Generating embeddings for transactions...")
-        self.transaction_embeddings = self.model.encode(descriptions)
+        # Embeddings come back L2-normalized, so inner product equals cosine similarity
+        # Kept as C-contiguous float32, the layout FAISS searches without copying
+        self.transaction_embeddings = np.ascontiguousarray(
+            self._embed_descriptions(descriptions), dtype=np.float32
+        )
         
         # Build FAISS index
-        dimension = self.transaction_embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-        
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(self.transaction_embeddings)
-        self.index.add(self.transaction_embeddings.astype(np.float32))
+        self.index = self._create_index(*self.transaction_embeddings.shape)
+        self.index.add(self.transaction_embeddings)
         
         # Store in Weaviate if available
         self._store_in_weaviate()
         
         logger.info(f"Built similarity index with {len(descriptions)} transactions")
     
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in large batches with L2 normalization fused into the encode step."""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        # Half-precision models return float16; FAISS expects contiguous float32
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def _create_index(self, num_vectors: int, dimension: int) -> faiss.Index:
+        """Create an inner-product (cosine) FAISS index sized for the corpus."""
+        self._gpu_resources = None
+        if num_vectors < HNSW_MIN_TRANSACTIONS:
+            index = faiss.IndexFlatIP(dimension)
+            # Flat search is memory-bandwidth bound; run it on the GPU when FAISS was built with CUDA
+            if hasattr(faiss, 'StandardGpuResources') and faiss.get_num_gpus() > 0:
+                self._gpu_resources = faiss.StandardGpuResources()
+                index = faiss.index_cpu_to_gpu(self._gpu_resources, 0, index)
+            return index
+        
+        index = faiss.IndexHNSWFlat(dimension, HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        # Query-time recall/speed trade-off; raise for better recall on very large corpora
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+    
+    def _get_embedding_cache_path(self) -> Path:
+        """Build the embedding cache file path for the model, its precision and its device."""
+        key = f"{self.config.embedding_model}|{self._embedding_precision}|{self._embedding_device}"
+        return self.config.embedding_cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.npz"
+    
+    def _write_embedding_cache(self, cache_path: Path, cached: Dict[str, np.ndarray]):
+        """Atomically write the embedding cache so interrupted runs never leave a partial archive.
+        
+        Failures are logged and swallowed so a disk error never discards freshly computed embeddings.
+        """
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, keys=np.array(list(cached)), vectors=np.stack(list(cached.values())))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write embedding cache {cache_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def _embed_descriptions(self, descriptions: List[str]) -> np.ndarray:
+        """Embed descriptions, encoding only those missing from the on-disk cache."""
+        keys = [hashlib.sha1(desc.encode()).hexdigest() for desc in descriptions]
+        
+        # Each distinct description is encoded once; repeated rows share the vector
+        distinct = {}
+        for key, desc in zip(keys, descriptions):
+            distinct.setdefault(key, desc)
+        
+        cache_path = self._get_embedding_cache_path()
+        cached = {}
+        if cache_path.exists():
+            try:
+                with np.load(cache_path) as cache:
+                    cached = dict(zip(cache['keys'].tolist(), cache['vectors']))
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable embedding cache {cache_path}: {e}")
+        
+        missing = [key for key in distinct if key not in cached]
+        if missing:
+            cached.update(zip(missing, self._encode([distinct[key] for key in missing])))
+            self._write_embedding_cache(cache_path, cached)
+        logger.info(f"Encoded {len(missing)} of {len(distinct)} distinct descriptions for {len(keys)} transactions")
+        
+        return np.stack([cached[key] for key in keys])
+    
+    def _encode_query_uncached(self, text: str) -> np.ndarray:
+        """Embed a single query as a read-only 1 x d matrix (shared through the query cache)."""
+        embedding = self._encode([text])
+        embedding.flags.writeable = False
+        return embedding
+    
+    def _describe_transactions(self, transactions_df: pd.DataFrame) -> List[str]:
+        """Build the embedding text for every transaction by zipping whole columns."""
+        subcategories = (
+            transactions_df['subcategory'] if 'subcategory' in transactions_df.columns
+            else [''] * len(transactions_df)
+        )
+        return [
+            f"{category} {subcategory} {vendor} {amount:.2f}€"
+            for category, subcategory, vendor, amount in zip(
+                transactions_df['category'], subcategories,
+                transactions_df['vendor'], transactions_df['amount']
+            )
+        ]
+    
     def _store_in_weaviate(self):
         """Store transactions in Weaviate vector database."""
         if not self.weaviate_client:
             return
             
         try:
+            has_subcategory = 'subcategory' in self.transactions_df.columns
+            # Only the uploaded fields are materialized per row
+            columns = ['user_id', 'amount', 'category', 'vendor', 'transaction_date']
+            if has_subcategory:
+                columns.append('subcategory')
+            upload_df = self.transactions_df[columns]
+            # Let the client auto-flush dynamically sized batches from several worker threads
+            self.weaviate_client.batch.configure(
+                batch_size=200,
+                dynamic=True,
+                num_workers=4,
+                timeout_retries=3
+            )
             with self.weaviate_client.batch as batch:
-                for idx, (_, row) in enumerate(self.transactions_df.iterrows()):
+                for idx, row in enumerate(upload_df.itertuples(index=False)):
+                    subcategory = row.subcategory if has_subcategory else ''
                     data_object = {
-                        "user_id": row['user_id'],
-                        "amount": float(row['amount']),
-                        "category": row['category'],
-                        "subcategory": row.get('subcategory', ''),
-                        "vendor": row['vendor'],
-                        "transaction_date": row['transaction_date'].isoformat(),
-                        "description": f"{row['category']} {row.get('subcategory', '')} {row['vendor']}"
+                        "user_id": row.user_id,
+                        "amount": float(row.amount),
+                        "category": row.category,
+                        "subcategory": subcategory,
+                        "vendor": row.vendor,
+                        "transaction_date": row.transaction_date.isoformat(),
+                        "description": f"{row.category} {subcategory} {row.vendor}"
                     }
                     
                     batch.add_data_object(
                         data_object,
                         "Transaction",
-                        vector=self.transaction_embeddings[idx].tolist()
+                        vector=self.transaction_embeddings[idx]
                     )
             
             logger.info("Stored transactions in Weaviate")
@@ -127,104 +287,125 @@ class SimilaritySearchEngine:
         query_desc = f"{query_transaction['category']} {query_transaction.get('subcategory', '')} {query_transaction['vendor']} {query_transaction['amount']:.2f}€"
         
         # Generate query embedding
-        query_embedding = self.model.encode([query_desc])
-        faiss.normalize_L2(query_embedding)
+        query_embedding = self._encode_query(query_desc)
         
         # Search similar transactions
-        scores, indices = self.index.search(query_embedding.astype(np.float32), top_k * 2)  # Get more to filter
-        
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1:  # No more results
-                break
-                
-            transaction = self.transactions_df.iloc[idx]
-            
-            # Skip if excluding user
-            if exclude_user and transaction['user_id'] == exclude_user:
-                continue
-                
-            results.append({
-                'transaction': transaction.to_dict(),
-                'similarity_score': float(score),
-                'index': int(idx)
-            })
-            
-            if len(results) >= top_k:
-                break
+        scores, indices = self.index.search(query_embedding, top_k * 2)  # Get more to filter
         
-        return results
+        return self._collect_results(scores[0], indices[0], top_k, exclude_user)
+    
+    def _collect_results(self, scores: np.ndarray, indices: np.ndarray,
+                         top_k: int, exclude_user: str = None) -> List[Dict[str, Any]]:
+        """Turn one row of FAISS search output into result dicts, skipping the excluded user."""
+        scores, indices = self._valid_hits(scores, indices)
+        
+        # Skip if excluding user
+        if exclude_user:
+            keep = self._user_ids[indices] != exclude_user
+            scores, indices = scores[keep], indices[keep]
+        
+        return self._build_results(scores[:top_k], indices[:top_k])
+    
+    def _build_results(self, scores: np.ndarray, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """Materialize search hits as result dicts with a single row lookup."""
+        transactions = self.transactions_df.iloc[indices].to_dict('records')
+        return [
+            {
+                'transaction': transaction,
+                'similarity_score': score,
+                'index': idx
+            }
+            for transaction, score, idx in zip(transactions, scores.tolist(), indices.tolist())
+        ]
+    
+    @staticmethod
+    def _valid_hits(scores: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Trim one row of FAISS output at the first missing (-1) result."""
+        missing = np.flatnonzero(indices == -1)
+        end = missing[0] if len(missing) else len(indices)
+        return scores[:end], indices[:end]
     
     def find_similar_by_category(self, category: str, subcategory: str = None, 
                                top_k: int = 10) -> List[Dict[str, Any]]:
         """Find similar transactions by category and subcategory."""
-        # Filter transactions by category
-        filtered_df = self.transactions_df[self.transactions_df['category'] == category]
-        
+        # Positions of the matching transactions, precomputed in build_index
         if subcategory:
-            filtered_df = filtered_df[filtered_df.get('subcategory', '') == subcategory]
+            positions = self._subcategory_positions.get((category, subcategory))
+        else:
+            positions = self._category_positions.get(category)
         
-        if filtered_df.empty:
+        if positions is None:
             return []
         
-        # Get indices of filtered transactions
-        indices = filtered_df.index.tolist()
-        
         # Get embeddings for these transactions
-        filtered_embeddings = self.transaction_embeddings[indices]
+        filtered_embeddings = self.transaction_embeddings[positions]
         
-        # Calculate average embedding
-        avg_embedding = np.mean(filtered_embeddings, axis=0, keepdims=True)
-        faiss.normalize_L2(avg_embedding)
+        # Calculate average embedding, rescaled to unit length for cosine search
+        avg_embedding = filtered_embeddings.mean(axis=0, keepdims=True, dtype=np.float32)
+        norm = np.linalg.norm(avg_embedding)
+        if norm > 0:
+            avg_embedding /= norm
         
         # Search for similar transactions
-        scores, result_indices = self.index.search(avg_embedding.astype(np.float32), top_k)
-        
-        results = []
-        for score, idx in zip(scores[0], result_indices[0]):
-            if idx == -1:
-                break
-                
-            transaction = self.transactions_df.iloc[idx]
-            results.append({
-                'transaction': transaction.to_dict(),
-                'similarity_score': float(score),
-                'index': int(idx)
-            })
+        scores, result_indices = self.index.search(avg_embedding, top_k)
+        
+        return self._build_results(*self._valid_hits(scores[0], result_indices[0]))
+    
+    def find_similar_by_categories(self, categories: List[str],
+                                   top_k: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """Find similar transactions for several categories with a single index search."""
+        known = [category for category in categories if category in self._category_positions]
+        results = {category: [] for category in categories}
+        if not known:
+            return results
+        
+        # Gather the categories' embeddings contiguously and sum each block in one pass
+        positions = [self._category_positions[category] for category in known]
+        counts = np.array([len(p) for p in positions])
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.add.reduceat(self.transaction_embeddings[np.concatenate(positions)], offsets, axis=0, dtype=np.float64)
+        
+        # Category centroids, rescaled to unit length for cosine search
+        centroids = (sums / counts[:, None]).astype(np.float32)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        np.divide(centroids, norms, out=centroids, where=norms > 0)
+        
+        scores, indices = self.index.search(centroids, top_k)
+        for category, row_scores, row_indices in zip(known, scores, indices):
+            results[category] = self._build_results(*self._valid_hits(row_scores, row_indices))
         
         return results
     
     def find_user_similar_patterns(self, user_id: str, top_k: int = 10) -> Dict[str, List[Dict[str, Any]]]:
         """Find similar spending patterns for a user."""
-        user_transactions = self.transactions_df[self.transactions_df['user_id'] == user_id]
+        user_ids = self._user_ids
+        user_positions = np.flatnonzero(user_ids == user_id)
         
-        if user_transactions.empty:
+        if len(user_positions) == 0:
             return {}
         
+        # Query with the user's already-indexed embeddings in a single batched search
+        # (5 results per transaction, with headroom for filtering out the user's own rows)
+        scores, indices = self.index.search(self.transaction_embeddings[user_positions], 10)
+        user_categories = self.transactions_df['category'].to_numpy()[user_positions]
+        
+        # Keep the first 5 hits per transaction that belong to other users, in rank order
+        matches = (indices != -1) & (user_ids[indices] != user_id)
+        matches &= np.cumsum(matches, axis=1) <= 5
+        
         # Group by category
         patterns = {}
-        for category in user_transactions['category'].unique():
-            category_transactions = user_transactions[user_transactions['category'] == category]
+        for category in pd.unique(user_categories):
+            rows = user_categories == category
+            candidate_indices = indices[rows][matches[rows]]
+            candidate_scores = scores[rows][matches[rows]]
             
-            # Find similar transactions in this category from other users
-            similar_transactions = []
-            for _, transaction in category_transactions.iterrows():
-                similar = self.find_similar_transactions(
-                    transaction.to_dict(), 
-                    top_k=5, 
-                    exclude_user=user_id
-                )
-                similar_transactions.extend(similar)
+            # Remove duplicates (first occurrence wins) and sort by similarity, stable like sorted()
+            _, first = np.unique(candidate_indices, return_index=True)
+            first.sort()
+            ranked = first[np.argsort(-candidate_scores[first], kind='stable')][:top_k]
             
-            # Remove duplicates and sort by similarity
-            seen_indices = set()
-            unique_similar = []
-            for item in similar_transactions:
-                if item['index'] not in seen_indices:
-                    seen_indices.add(item['index'])
-                    unique_similar.append(item)
-            
-            patterns[category] = sorted(unique_similar, key=lambda x: x['similarity_score'], reverse=True)[:top_k]
+            patterns[category] = self._build_results(candidate_scores[ranked], candidate_indices[ranked])
         
         return patterns
     
@@ -264,24 +445,11 @@ class SimilaritySearchEngine:
         if self.index is None:
             return []
         
-        query_embedding = self.model.encode([query_text])
-        faiss.normalize_L2(query_embedding)
-        
-        scores, indices = self.index.search(query_embedding.astype(np.float32), top_k)
+        query_embedding = self._encode_query(query_text)
         
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1:
-                break
-                
-            transaction = self.transactions_df.iloc[idx]
-            results.append({
-                'transaction': transaction.to_dict(),
-                'similarity_score': float(score),
-                'index': int(idx)
-            })
+        scores, indices = self.index.search(query_embedding, top_k)
         
-        return results
+        return self._build_results(*self._valid_hits(scores[0], indices[0]))
     
     def get_transaction_clusters(self, user_id: str = None) -> Dict[str, List[Dict[str, Any]]]:
         """Get transaction clusters for analysis."""
@@ -291,24 +459,29 @@ class SimilaritySearchEngine:
         df = self.transactions_df
         if user_id:
             df = df[df['user_id'] == user_id]
+            category_positions = df.groupby('category', sort=False).indices
+        else:
+            category_positions = self._category_positions
         
-        clusters = {}
-        for category in df['category'].unique():
-            category_transactions = df[df['category'] == category]
-            clusters[category] = [tx.to_dict() for _, tx in category_transactions.iterrows()]
-        
-        return clusters
+        return {
+            category: df.iloc[positions].to_dict('records')
+            for category, positions in category_positions.items()
+        }
     
     def save_index(self, filepath: str):
         """Save the FAISS index to disk."""
         if self.index is not None:
-            faiss.write_index(self.index, filepath)
+            tmp_path = f"{filepath}.tmp"
+            index = faiss.index_gpu_to_cpu(self.index) if self._gpu_resources is not None else self.index
+            faiss.write_index(index, tmp_path)
+            os.replace(tmp_path, filepath)
             logger.info(f"Index saved to {filepath}")
     
     def load_index(self, filepath: str):
         """Load FAISS index from disk."""
         if Path(filepath).exists():
             self.index = faiss.read_index(filepath)
+            self._gpu_resources = None
             logger.info(f"Index loaded from {filepath}")
         else:
             logger.warning(f"Index file not found: {filepath}")
\ No newline at end of file
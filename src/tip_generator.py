@@ -1,14 +1,51 @@
 """Tax tip generation module for creating personalized recommendations."""
 
+import os
+import heapq
+import pickle
+import hashlib
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Tuple, Iterable, NamedTuple
 import logging
 from datetime import datetime, timedelta
+from pathlib import Path
 import json
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+class DeductionRule(NamedTuple):
+    """A deduction rule flattened for iteration, with a missing annual cap resolved to infinity."""
+    category: str
+    deduction_rate: float
+    min_amount: float
+    max_annual: float
+    description: str
+
+# Fingerprint of this module's source, so cached tips are invalidated by code changes
+SOURCE_FINGERPRINT = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+# Below this many users, starting worker processes costs more than generating tips serially
+PARALLEL_MIN_USERS = 64
+
+# Inputs shared by every user in a worker process, set once by the pool initializer
+_worker_state = {}
+
+def _init_tip_worker(generator: 'TipGenerator', users_df: pd.DataFrame,
+                     tax_filings_df: pd.DataFrame, patterns: Dict[str, Any]):
+    """Keep the shared tip generation inputs in this worker process."""
+    _worker_state.update(generator=generator, users_df=users_df,
+                         tax_filings_df=tax_filings_df, patterns=patterns)
+
+def _generate_tips_in_worker(user_id: str, user_transactions: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Generate one user's tips from the worker's shared inputs."""
+    return _worker_state['generator'].generate_tips_for_user(
+        user_id, user_transactions, _worker_state['users_df'],
+        _worker_state['tax_filings_df'], _worker_state['patterns']
+    )
+
 class TipGenerator:
     """Generator for personalized tax optimization tips."""
     
@@ -50,6 +87,26 @@ class TipGenerator:
             }
         }
         
+        # The rules as a tuple of records, so hot loops use attribute access instead of nested dict lookups
+        self._rules = tuple(
+            DeductionRule(category, rules['deduction_rate'], rules['min_amount'],
+                          rules['max_annual'] or float('inf'), rules['description'])
+            for category, rules in self.deduction_rules.items()
+        )
+        
+        # Deductible category names, reused by every membership test
+        self._deductible_categories = list(self.deduction_rules)
+        
+        # Deduction tip action items depend only on the category, so render them once
+        self._deduction_action_items = {
+            category: [
+                f"Gather receipts for all {category.lower()} expenses",
+                f"Ensure expenses total at least €{rules['min_amount']} to qualify",
+                "Consult with a tax professional to confirm eligibility"
+            ]
+            for category, rules in self.deduction_rules.items()
+        }
+        
         # Tax brackets (simplified German tax system)
         self.tax_brackets = [
             (0, 10908, 0.0),
@@ -58,6 +115,21 @@ class TipGenerator:
             (62810, 277825, 0.42),
             (277826, float('inf'), 0.45)
         ]
+        
+        # Lower bracket bounds and their rates as arrays for binary-search lookups
+        self._bracket_edges = np.array([bracket[0] for bracket in self.tax_brackets], dtype=float)
+        self._bracket_rates = np.array([bracket[2] for bracket in self.tax_brackets])
+        
+        # Rate for the default income assumed when a user has no tax filing
+        self._default_tax_bracket = self._get_tax_bracket(50000)
+        
+        # User-to-cluster lookup, rebuilt only when a different clustering result is passed in
+        self._clustering_patterns = None
+        self._user_to_cluster = {}
+        
+        # Spending total per occupation, rebuilt only when different occupation patterns are passed in
+        self._occupation_patterns = None
+        self._occupation_spending = {}
     
     def generate_tips_for_user(self, user_id: str, transactions_df: pd.DataFrame,
                               users_df: pd.DataFrame, tax_filings_df: pd.DataFrame,
@@ -68,8 +140,8 @@ class TipGenerator:
         Args:
             user_id: Target user ID
             transactions_df: Transaction data
-            users_df: User demographic data
-            tax_filings_df: Tax filing data
+            users_df: User demographic data (optionally indexed by user_id)
+            tax_filings_df: Tax filing data (optionally indexed by user_id)
             patterns: Discovered patterns from analysis
             
         Returns:
@@ -78,71 +150,164 @@ class TipGenerator:
         tips = []
         
         # Get user data
-        user_info = users_df[users_df['user_id'] == user_id].iloc[0] if not users_df[users_df['user_id'] == user_id].empty else None
+        user_info = self._get_user_row(users_df, user_id)
         user_transactions = transactions_df[transactions_df['user_id'] == user_id]
-        user_tax_data = tax_filings_df[tax_filings_df['user_id'] == user_id].iloc[0] if not tax_filings_df[tax_filings_df['user_id'] == user_id].empty else None
+        user_tax_data = self._get_user_row(tax_filings_df, user_id)
         
         if user_info is None or user_transactions.empty:
             return tips
         
+        # Spending per category in a single pass, shared by the helpers below
+        category_stats = user_transactions.groupby('category', sort=False, observed=True)['amount'].agg(
+            ['sum', 'count', 'mean']
+        ).to_dict('index')
+        
         # Generate different types of tips
-        tips.extend(self._generate_deduction_tips(user_id, user_transactions, user_tax_data, user_info))
+        tips.extend(self._generate_deduction_tips(user_id, category_stats, user_tax_data, user_info))
         tips.extend(self._generate_timing_tips(user_id, user_transactions, patterns))
-        tips.extend(self._generate_category_optimization_tips(user_id, user_transactions, user_info, patterns))
+        tips.extend(self._generate_category_optimization_tips(user_id, user_transactions, category_stats, user_info, patterns))
         tips.extend(self._generate_similar_user_tips(user_id, user_info, patterns))
         tips.extend(self._generate_compliance_tips(user_id, user_transactions, user_tax_data))
         
-        # Sort tips by potential impact and confidence
-        tips.sort(key=lambda x: x['potential_savings'] * x['confidence'], reverse=True)
+        # Keep the top 10 tips by potential impact and confidence (ties keep their generation order)
+        tips = heapq.nlargest(10, tips, key=lambda x: x['potential_savings'] * x['confidence'])
         
         # Add tip IDs and priorities
         for i, tip in enumerate(tips):
             tip['tip_id'] = f"TIP_{user_id}_{i+1:03d}"
             tip['priority'] = self._calculate_priority(tip)
         
-        return tips[:10]  # Return top 10 tips
+        return tips
     
-    def _generate_deduction_tips(self, user_id: str, transactions_df: pd.DataFrame,
+    def generate_tips_for_users(self, user_ids: Iterable[str], transactions_df: pd.DataFrame,
+                                users_df: pd.DataFrame, tax_filings_df: pd.DataFrame,
+                                patterns: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Generate personalized tax optimization tips for many users.
+        
+        Large batches are spread over ``config.tip_workers`` processes;
+        small ones run serially. With ``config.cache_results`` set, results
+        are cached on disk by input data, rules and generator code.
+        
+        Args:
+            user_ids: Target user IDs
+            transactions_df: Transaction data for all users
+            users_df: User demographic data
+            tax_filings_df: Tax filing data
+            patterns: Discovered patterns from analysis
+            
+        Returns:
+            Tips per user ID, in the order of ``user_ids``
+        """
+        user_ids = list(user_ids)
+        
+        cache_path = None
+        if self.config.cache_results:
+            cache_path = self._get_cache_path(user_ids, transactions_df, users_df, tax_filings_df, patterns)
+            if cache_path.exists():
+                with open(cache_path, 'rb') as f:
+                    all_tips = pickle.load(f)
+                logger.info(f"Loaded cached tips from {cache_path}")
+                return all_tips
+        
+        # Partition transactions once, so each user (or worker task) only carries its own rows
+        transactions_by_user = dict(tuple(transactions_df.groupby('user_id', sort=False)))
+        no_transactions = transactions_df.iloc[:0]
+        user_transactions = [transactions_by_user.get(user_id, no_transactions) for user_id in user_ids]
+        
+        # Index user and filing rows by user ID once, so per-user lookups are hash lookups
+        users_df = users_df.set_index('user_id', drop=False)
+        tax_filings_df = tax_filings_df.set_index('user_id', drop=False)
+        
+        workers = min(self.config.tip_workers, len(user_ids))
+        if len(user_ids) < PARALLEL_MIN_USERS or workers <= 1:
+            all_tips = [
+                self.generate_tips_for_user(user_id, transactions, users_df, tax_filings_df, patterns)
+                for user_id, transactions in zip(user_ids, user_transactions)
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_tip_worker,
+                                     initargs=(self, users_df, tax_filings_df, patterns)) as executor:
+                all_tips = list(executor.map(
+                    _generate_tips_in_worker, user_ids, user_transactions,
+                    chunksize=max(1, len(user_ids) // (4 * workers))
+                ))
+        
+        all_tips = dict(zip(user_ids, all_tips))
+        if cache_path is not None:
+            self._write_cache(cache_path, all_tips)
+        
+        return all_tips
+    
+    def _get_cache_path(self, user_ids: List[str], transactions_df: pd.DataFrame,
+                        users_df: pd.DataFrame, tax_filings_df: pd.DataFrame,
+                        patterns: Dict[str, Any]) -> Path:
+        """Build the tips cache file path for the given users, input data, rules and generator code."""
+        digest = hashlib.sha256()
+        digest.update(SOURCE_FINGERPRINT.encode())
+        # Rules and brackets can be changed on an instance, so they are keyed separately from the code
+        digest.update(pickle.dumps((self.deduction_rules, self.tax_brackets)))
+        for df in (transactions_df, users_df, tax_filings_df):
+            # Column names and dtypes are part of the key so schema changes miss the cache
+            digest.update(repr(list(df.dtypes.items())).encode())
+            digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        digest.update(pickle.dumps((user_ids, patterns)))
+        return self.config.tips_cache_dir / f"{digest.hexdigest()}.pkl"
+    
+    def _write_cache(self, cache_path: Path, all_tips: Dict[str, List[Dict[str, Any]]]):
+        """Atomically write a cache entry so interrupted runs never leave a partial pickle."""
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(all_tips, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    
+    @staticmethod
+    def _get_user_row(df: pd.DataFrame, user_id: str) -> pd.Series:
+        """Return the user's first row, or None; uses the index when the frame is indexed by user_id."""
+        if df.index.name == 'user_id':
+            user_rows = df.loc[[user_id]] if user_id in df.index else df.iloc[:0]
+        else:
+            user_rows = df[df['user_id'] == user_id]
+        return user_rows.iloc[0] if not user_rows.empty else None
+    
+    def _generate_deduction_tips(self, user_id: str, category_stats: Dict[str, Dict[str, float]],
                                tax_data: pd.Series, user_info: pd.Series) -> List[Dict[str, Any]]:
         """Generate tips related to missed deductions."""
         tips = []
         
-        for category, rules in self.deduction_rules.items():
-            category_transactions = transactions_df[transactions_df['category'] == category]
+        tax_bracket = self._get_tax_bracket(tax_data['total_income']) if tax_data is not None else self._default_tax_bracket
+        
+        for rule in self._rules:
+            category = rule.category
+            stats = category_stats.get(category)
             
-            if category_transactions.empty:
+            if stats is None:
                 continue
             
-            total_spending = category_transactions['amount'].sum()
-            potential_deduction = min(total_spending * rules['deduction_rate'], 
-                                    rules['max_annual'] or float('inf'))
+            total_spending = stats['sum']
+            potential_deduction = min(total_spending * rule.deduction_rate, rule.max_annual)
             
-            if potential_deduction >= rules['min_amount']:
+            if potential_deduction >= rule.min_amount:
                 current_deductions = tax_data['total_deductions'] if tax_data is not None else 0
                 
                 # Estimate if this deduction was likely missed
                 estimated_missed = max(0, potential_deduction - (current_deductions * 0.2))  # Assume 20% of deductions are from this category
                 
                 if estimated_missed > 50:  # Only suggest if significant impact
-                    tax_bracket = self._get_tax_bracket(tax_data['total_income'] if tax_data is not None else 50000)
                     potential_savings = estimated_missed * tax_bracket
                     
                     tip = {
                         'type': 'deduction_opportunity',
                         'category': category,
                         'title': f"Maximize {category} Deductions",
-                        'description': f"You spent €{total_spending:.2f} on {rules['description'].lower()}. You could potentially deduct €{potential_deduction:.2f}, saving approximately €{potential_savings:.2f} in taxes.",
-                        'action_items': [
-                            f"Gather receipts for all {category.lower()} expenses",
-                            f"Ensure expenses total at least €{rules['min_amount']} to qualify",
-                            "Consult with a tax professional to confirm eligibility"
-                        ],
+                        'description': f"You spent €{total_spending:.2f} on {rule.description.lower()}. You could potentially deduct €{potential_deduction:.2f}, saving approximately €{potential_savings:.2f} in taxes.",
+                        'action_items': list(self._deduction_action_items[category]),
                         'potential_savings': potential_savings,
                         'confidence': 0.8,
                         'evidence': {
                             'total_spending': total_spending,
-                            'transaction_count': len(category_transactions),
-                            'average_transaction': category_transactions['amount'].mean()
+                            'transaction_count': stats['count'],
+                            'average_transaction': stats['mean']
                         }                    }
                     tips.append(tip)
         
@@ -153,11 +318,11 @@ class TipGenerator:
         """Generate tips related to transaction timing."""
         tips = []
         
-        # Check for December spending patterns - use .copy() to avoid warning
-        transactions_copy = transactions_df.copy()
-        transactions_copy['month'] = transactions_copy['transaction_date'].dt.month
-        december_transactions = transactions_copy[transactions_copy['month'] == 12]
-        charitable_december = december_transactions[december_transactions['category'] == 'Charitable Donations']
+        # Months as a standalone Series, so the user's frame is never copied
+        months = transactions_df['transaction_date'].dt.month
+        
+        # Check for December spending patterns
+        charitable_december = transactions_df[(months == 12) & (transactions_df['category'] == 'Charitable Donations')]
         
         if not charitable_december.empty:
             avg_charitable = charitable_december['amount'].mean()
@@ -182,10 +347,14 @@ class TipGenerator:
             tips.append(tip)
         
         # Check for medical expense timing
-        medical_transactions = transactions_df[transactions_df['category'] == 'Medical']
+        is_medical = transactions_df['category'] == 'Medical'
+        medical_transactions = transactions_df[is_medical]
         if not medical_transactions.empty:
-            medical_by_month = medical_transactions.groupby('month')['amount'].sum()
-            medical_variance = medical_by_month.std()
+            # Monthly totals via bincount; the sample std covers only months with medical spending, like a groupby
+            medical_months = months[is_medical].to_numpy()
+            medical_by_month = np.bincount(medical_months, weights=medical_transactions['amount'].to_numpy(), minlength=13)
+            active_months = np.bincount(medical_months, minlength=13) > 0
+            medical_variance = medical_by_month[active_months].std(ddof=1) if active_months.sum() > 1 else np.nan
             
             if medical_variance > 100:  # High variance suggests irregular timing
                 tip = {
@@ -210,7 +379,7 @@ class TipGenerator:
         return tips
     
     def _generate_category_optimization_tips(self, user_id: str, transactions_df: pd.DataFrame,
-                                           user_info: pd.Series, patterns: Dict[str, Any]) -> List[Dict[str, Any]]:
+                                           category_stats: Dict[str, Dict[str, float]], user_info: pd.Series, patterns: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate tips for optimizing spending in specific categories."""
         tips = []
         
@@ -219,23 +388,25 @@ class TipGenerator:
         occupation_patterns = patterns.get('demographic_patterns', {}).get('spending_by_occupation', {})
         
         if user_occupation in occupation_patterns:
-            user_total_spending = transactions_df['amount'].sum()
-            avg_occupation_spending = occupation_patterns.get(user_occupation, {}).get('sum', user_total_spending)
+            avg_occupation_spending = self._get_occupation_spending(occupation_patterns).get(user_occupation)
+            
+            # Fall back to the user's own total when the occupation has no spending figure
+            if avg_occupation_spending is None:
+                avg_occupation_spending = transactions_df['amount'].sum()
             
-            if isinstance(avg_occupation_spending, dict):
-                avg_occupation_spending = list(avg_occupation_spending.values())[0] if avg_occupation_spending else user_total_spending
+            tax_bracket = self._default_tax_bracket
             
             # Check for under-spending in deductible categories
-            for category in self.deduction_rules.keys():
-                user_category_spending = transactions_df[transactions_df['category'] == category]['amount'].sum()
+            for rule in self._rules:
+                category = rule.category
+                user_category_spending = category_stats[category]['sum'] if category in category_stats else 0
                 
                 # Estimate typical spending for this occupation in this category
                 category_ratio = 0.1 if category == 'Professional Development' else 0.05
                 expected_spending = avg_occupation_spending * category_ratio
                 
                 if user_category_spending < expected_spending * 0.5:  # Significantly under-spending
-                    potential_deduction = expected_spending * self.deduction_rules[category]['deduction_rate']
-                    tax_bracket = self._get_tax_bracket(50000)  # Default bracket
+                    potential_deduction = expected_spending * rule.deduction_rate
                     potential_savings = potential_deduction * tax_bracket
                     
                     tip = {
@@ -260,6 +431,21 @@ class TipGenerator:
         
         return tips
     
+    def _get_occupation_spending(self, occupation_patterns: Dict[str, Any]) -> Dict[str, float]:
+        """Reduce each occupation's spending pattern to a single total, cached for the patterns last seen."""
+        if occupation_patterns is not self._occupation_patterns:
+            occupation_spending = {}
+            for occupation, spending in occupation_patterns.items():
+                total = spending.get('sum') if isinstance(spending, dict) else None
+                if isinstance(total, dict):
+                    # Nested per-group totals: use the first one
+                    total = next(iter(total.values()), None)
+                if total is not None:
+                    occupation_spending[occupation] = total
+            self._occupation_patterns = occupation_patterns
+            self._occupation_spending = occupation_spending
+        return self._occupation_spending
+    
     def _generate_similar_user_tips(self, user_id: str, user_info: pd.Series,
                                   patterns: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate tips based on similar users' successful strategies."""
@@ -267,14 +453,9 @@ class TipGenerator:
         
         # Get clustering patterns
         clustering_patterns = patterns.get('clustering_patterns', {})
-        user_clusters = clustering_patterns.get('user_clusters', [])
         
         # Find user's cluster
-        user_cluster = None
-        for cluster_info in user_clusters:
-            if cluster_info['user_id'] == user_id:
-                user_cluster = cluster_info['cluster']
-                break
+        user_cluster = self._get_user_to_cluster(clustering_patterns).get(user_id)
         
         if user_cluster is not None:
             cluster_analysis = clustering_patterns.get('cluster_analysis', {})
@@ -305,14 +486,25 @@ class TipGenerator:
         
         return tips
     
+    def _get_user_to_cluster(self, clustering_patterns: Dict[str, Any]) -> Dict[str, Any]:
+        """Map user IDs to their cluster, cached for the clustering result last seen."""
+        if clustering_patterns is not self._clustering_patterns:
+            user_to_cluster = {}
+            for cluster_info in clustering_patterns.get('user_clusters', []):
+                # First entry wins, as with a linear scan
+                user_to_cluster.setdefault(cluster_info['user_id'], cluster_info['cluster'])
+            self._clustering_patterns = clustering_patterns
+            self._user_to_cluster = user_to_cluster
+        return self._user_to_cluster
+    
     def _generate_compliance_tips(self, user_id: str, transactions_df: pd.DataFrame,
                                 tax_data: pd.Series) -> List[Dict[str, Any]]:
         """Generate compliance and documentation tips."""
         tips = []
         
         # Check for large transactions without proper documentation
-        large_transactions = transactions_df[transactions_df['amount'] > 500]
-        deductible_large = large_transactions[large_transactions['category'].isin(self.deduction_rules.keys())]
+        amounts = transactions_df['amount']
+        deductible_large = amounts[(amounts > 500) & transactions_df['category'].isin(self._deductible_categories)]
         
         if not deductible_large.empty:
             tip = {
@@ -329,7 +521,7 @@ class TipGenerator:
                 'confidence': 0.9,
                 'evidence': {
                     'large_transaction_count': len(deductible_large),
-                    'total_large_amount': deductible_large['amount'].sum()
+                    'total_large_amount': deductible_large.sum()
                 }
             }
             tips.append(tip)
@@ -357,11 +549,10 @@ class TipGenerator:
         return tips
     
     def _get_tax_bracket(self, income: float) -> float:
-        """Get marginal tax rate for given income."""
-        for min_income, max_income, rate in self.tax_brackets:
-            if min_income <= income <= max_income:
-                return rate
-        return 0.45  # Highest bracket
+        """Get marginal tax rate for given income, or an array of rates for an array of incomes."""
+        # Incomes below zero wrap to the last bracket, and NaN sorts past it, so both get the highest rate
+        rates = self._bracket_rates[np.searchsorted(self._bracket_edges, income, side='right') - 1]
+        return rates if np.ndim(income) else float(rates)
     
     def _calculate_priority(self, tip: Dict[str, Any]) -> str:
         """Calculate priority level for a tip."""
@@ -384,18 +575,18 @@ class TipGenerator:
                 'summary': "No optimization opportunities identified at this time."
             }
         
-        total_savings = sum(tip['potential_savings'] for tip in tips)
-        high_priority = len([tip for tip in tips if tip.get('priority') == 'HIGH'])
-        medium_priority = len([tip for tip in tips if tip.get('priority') == 'MEDIUM'])
-        low_priority = len([tip for tip in tips if tip.get('priority') == 'LOW'])
-        
-        # Group tips by type
+        # Total savings, priority counts and tips grouped by type in a single pass
+        total_savings = 0
+        priority_counts = Counter()
         tips_by_type = {}
         for tip in tips:
-            tip_type = tip['type']
-            if tip_type not in tips_by_type:
-                tips_by_type[tip_type] = []
-            tips_by_type[tip_type].append(tip)
+            total_savings += tip['potential_savings']
+            priority_counts[tip.get('priority')] += 1
+            tips_by_type.setdefault(tip['type'], []).append(tip)
+        
+        high_priority = priority_counts['HIGH']
+        medium_priority = priority_counts['MEDIUM']
+        low_priority = priority_counts['LOW']
         
         return {
             'user_id': user_id,
@@ -3,18 +3,42 @@ Test script to verify the tax processing system functionality.
 Run this to ensure all components are working correctly.
 """
 
+import os
 import sys
 from pathlib import Path
+from functools import lru_cache
 import logging
 
 # Add src to path
 src_path = Path(__file__).parent / "src"
 sys.path.append(str(src_path))
 
+# Always run the real analyses, never results cached by an earlier run
+os.environ['CACHE_RESULTS'] = 'false'
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def load_test_data():
+    """Load the CSV data once and share it across tests."""
+    from src.config import get_config
+    from src.data_loader import DataLoader
+    
+    return DataLoader(get_config()).load_csv_data()
+
+@lru_cache(maxsize=None)
+def analyze_test_patterns():
+    """Run pattern analysis (without document data) once and share it across tests."""
+    from src.config import get_config
+    from src.pattern_analyzer import PatternAnalyzer
+    
+    transactions_df, users_df, tax_filings_df = load_test_data()
+    return PatternAnalyzer(get_config()).analyze_patterns(
+        transactions_df, users_df, tax_filings_df, [], []
+    )
+
 def test_imports():
     """Test that all modules can be imported successfully."""
     try:
@@ -34,8 +58,8 @@ def test_imports():
 def test_configuration():
     """Test configuration loading."""
     try:
-        from src.config import Config
-        config = Config()
+        from src.config import get_config
+        config = get_config()
         
         # Check required attributes
         required_attrs = [
@@ -58,14 +82,8 @@ def test_configuration():
 def test_data_loading():
     """Test data loading functionality."""
     try:
-        from src.config import Config
-        from src.data_loader import DataLoader
-        
-        config = Config()
-        data_loader = DataLoader(config)
-        
         # Test CSV loading
-        transactions_df, users_df, tax_filings_df = data_loader.load_csv_data()
+        transactions_df, users_df, tax_filings_df = load_test_data()
         
         if len(transactions_df) == 0:
             logger.error("❌ No transactions loaded")
@@ -88,21 +106,8 @@ def test_data_loading():
 def test_pattern_analysis():
     """Test pattern analysis functionality."""
     try:
-        from src.config import Config
-        from src.data_loader import DataLoader
-        from src.pattern_analyzer import PatternAnalyzer
-        
-        config = Config()
-        data_loader = DataLoader(config)
-        pattern_analyzer = PatternAnalyzer(config)
-        
-        # Load data
-        transactions_df, users_df, tax_filings_df = data_loader.load_csv_data()
-        
         # Test basic pattern analysis (without document data)
-        patterns = pattern_analyzer.analyze_patterns(
-            transactions_df, users_df, tax_filings_df, [], []
-        )
+        patterns = analyze_test_patterns()
         
         if not patterns:
             logger.error("❌ No patterns generated")
@@ -117,23 +122,14 @@ def test_pattern_analysis():
 def test_tip_generation():
     """Test tax tip generation functionality."""
     try:
-        from src.config import Config
-        from src.data_loader import DataLoader
-        from src.pattern_analyzer import PatternAnalyzer
+        from src.config import get_config
         from src.tip_generator import TipGenerator
         
-        config = Config()
-        data_loader = DataLoader(config)
-        pattern_analyzer = PatternAnalyzer(config)
-        tip_generator = TipGenerator(config)
+        tip_generator = TipGenerator(get_config())
         
-        # Load data
-        transactions_df, users_df, tax_filings_df = data_loader.load_csv_data()
-        
-        # Generate patterns
-        patterns = pattern_analyzer.analyze_patterns(
-            transactions_df, users_df, tax_filings_df, [], []
-        )
+        # Reuse the loaded data and patterns from the earlier tests
+        transactions_df, users_df, tax_filings_df = load_test_data()
+        patterns = analyze_test_patterns()
         
         # Test tip generation for first user
         first_user = users_df['user_id'].iloc[0]